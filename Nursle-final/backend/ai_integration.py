@@ -3,11 +3,14 @@
 # AI Integration Layer for Flask Application
 # Connects AI services with Flask routes and database operations
 
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from flask import current_app
-from ai_services import ai_manager
-from models import db
+from models import db, TriageRecord, TRIAGE_PRIORITIES
+from sinks import prediction_log_sink, triage_record_sink
 from datetime import datetime
-import json
 import logging
 from typing import Optional
 
@@ -18,6 +21,11 @@ class AIIntegration:
     
     def __init__(self, app=None):
         self.app = app
+        self._executor = None
+        self._executor_pid = None
+        self._executor_lock = threading.Lock()
+        self._manager = None
+        self._manager_lock = threading.Lock()
         if app is not None:
             self.init_app(app)
     
@@ -26,11 +34,57 @@ class AIIntegration:
         app.config.setdefault('AI_ENABLED', True)
         app.config.setdefault('AI_LOG_PREDICTIONS', True)
         app.config.setdefault('AI_CONFIDENCE_THRESHOLD', 0.7)
-        app.ai_manager = ai_manager
-
+        app.config.setdefault('AI_MAX_BATCH_SIZE', 1000)
+        app.config.setdefault('AI_RESULT_CACHE_SIZE', 1024)
+        app.config.setdefault('AI_WARM_UP', False)
+        app.config.setdefault('AI_EXECUTION_BACKEND', 'inline')
+        app.config.setdefault('AI_PROCESS_WORKERS',
+                              max(1, (os.cpu_count() or 1) // int(os.environ.get('WEB_CONCURRENCY', 1))))
+        app.config.setdefault('AI_PROCESS_CHUNK_SIZE', 256)
+        app.config.setdefault('TRIAGE_WRITE_MODE', 'immediate')
+        prediction_log_sink.init_app(app, prefix='AI_PREDICTION_LOG')
+        triage_record_sink.init_app(app, prefix='TRIAGE_RECORD')
+        app.config.setdefault('AI_ASYNC_WORKERS', min(32, (os.cpu_count() or 1) + 4))
+        self.app = app
+        if app.config['AI_WARM_UP']:
+            self.warm_up()
+    
+    @property
+    def manager(self):
+        """
+        The AIServiceManager, built on first use
+        Importing ai_services pulls in numpy and building the engines fills their
+        lookup tables, so neither happens until an AI route or warm_up() needs them.
+        """
+        if self._manager is None:
+            with self._manager_lock:
+                if self._manager is None:
+                    from ai_services import get_ai_manager
+                    manager = get_ai_manager()
+                    if self.app is not None:
+                        manager.result_cache.resize(self.app.config['AI_RESULT_CACHE_SIZE'])
+                        manager.configure_execution(
+                            self.app.config['AI_EXECUTION_BACKEND'],
+                            self.app.config['AI_PROCESS_WORKERS'],
+                            self.app.config['AI_PROCESS_CHUNK_SIZE']
+                        )
+                    self._manager = manager
+        return self._manager
+    
+    def warm_up(self, start_pool: bool = False):
+        """
+        Build the AI engines now, e.g. in the gunicorn master before forking workers
+        With start_pool, also bring up the 'process' backend's worker pool; do
+        that in each web worker, since a pool does not survive a fork.
+        """
+        manager = self.manager
+        if start_pool:
+            manager.start_pool()
+        return manager
     
     def process_symptom_check(self, symptoms: str, age: Optional[int] = None, 
-                            gender: Optional[str] = None, nurse_id: Optional[int] = None) -> dict:
+                            gender: Optional[str] = None, nurse_id: Optional[int] = None,
+                            patient_id: Optional[int] = None, priority: Optional[str] = None) -> dict:
         """
         Process symptom checking request with AI integration
         Args:
@@ -38,13 +92,15 @@ class AIIntegration:
             age: Patient age (optional)
             gender: Patient gender (optional)
             nurse_id: ID of nurse making request (optional)
+            patient_id: Patient to record the triage result against (optional)
+            priority: Triage priority, derived from diagnosis severity if omitted (optional)
         Returns:
             dict: AI diagnosis results with metadata
         """
         age_val = age if age is not None else 0
         gender_val = gender if gender is not None else ''
         try:
-            ai_result = ai_manager.get_diagnosis(symptoms, age_val, gender_val)
+            ai_result = self.manager.get_diagnosis(symptoms, age_val, gender_val)
             
             # Log the prediction if enabled
             if current_app.config.get('AI_LOG_PREDICTIONS', True):
@@ -52,9 +108,14 @@ class AIIntegration:
                     prediction_type='diagnosis',
                     input_data={'symptoms': symptoms, 'age': age, 'gender': gender},
                     ai_result=ai_result,
-                    nurse_id=nurse_id
+                    nurse_id=nurse_id,
+                    model_version=self.manager.diagnostic_engine.model_version,
+                    patient_id=patient_id
                 )
             
+            if patient_id is not None and nurse_id is not None:
+                self.record_triage(patient_id, nurse_id, symptoms, ai_result, priority)
+            
             # Format response for frontend
             formatted_result = self._format_diagnosis_response(ai_result)
             
@@ -62,12 +123,12 @@ class AIIntegration:
                 'success': True,
                 'data': formatted_result,
                 'ai_metadata': {
-                    'model_version': ai_manager.diagnostic_engine.model_version,
+                    'model_version': self.manager.diagnostic_engine.model_version,
                     'processing_time': ai_result.get('processing_time', 0),
                     'confidence_threshold': current_app.config.get('AI_CONFIDENCE_THRESHOLD')
                 }
             }
-            
+        
         except Exception as e:
             logger.error(f"AI symptom check error: {str(e)}")
             return {
@@ -76,6 +137,64 @@ class AIIntegration:
                 'fallback_data': self._get_manual_assessment_guidance()
             }
     
+    def process_symptom_check_batch(self, records: list, nurse_id: Optional[int] = None) -> dict:
+        """
+        Process a batch of symptom checking requests in one AI call
+        Args:
+            records: List of dicts with symptoms, age, gender and optionally
+                patient_id and priority for recording the triage result
+            nurse_id: ID of nurse making request (optional)
+        Returns:
+            dict: AI diagnosis results in input order with metadata
+        """
+        batch = [{
+            'symptoms': record['symptoms'],
+            'age': record.get('age') if record.get('age') is not None else 0,
+            'gender': record.get('gender') if record.get('gender') is not None else ''
+        } for record in records]
+        try:
+            ai_results = self.manager.get_diagnoses_batch(batch)
+            processing_time = sum(r.get('processing_time', 0) for r in ai_results)
+            
+            if nurse_id is not None:
+                self._write_triage_rows([
+                    self._triage_row(record['patient_id'], nurse_id, record['symptoms'],
+                                     ai_result, record.get('priority'))
+                    for record, ai_result in zip(records, ai_results)
+                    if record.get('patient_id') is not None
+                ])
+            
+            # One log entry per batch rather than per record
+            if current_app.config.get('AI_LOG_PREDICTIONS', True):
+                self._log_ai_prediction(
+                    prediction_type='diagnosis_batch',
+                    input_data={'batch_size': len(batch)},
+                    ai_result={
+                        'confidence': max((r.get('confidence', 0.0) for r in ai_results), default=0.0),
+                        'processing_time': processing_time
+                    },
+                    nurse_id=nurse_id,
+                    model_version=self.manager.diagnostic_engine.model_version
+                )
+            
+            return {
+                'success': True,
+                'data': [self._format_diagnosis_response(r) for r in ai_results],
+                'ai_metadata': {
+                    'model_version': self.manager.diagnostic_engine.model_version,
+                    'processing_time': processing_time,
+                    'confidence_threshold': current_app.config.get('AI_CONFIDENCE_THRESHOLD')
+                }
+            }
+        
+        except Exception as e:
+            logger.error(f"AI batch symptom check error: {str(e)}")
+            return {
+                'success': False,
+                'error': 'AI service temporarily unavailable',
+                'fallback_data': self._get_manual_assessment_guidance()
+            }
+    
     def process_predictive_analytics(self, symptoms: str, age: Optional[int] = None,
                                    priority: Optional[str] = None, nurse_id: Optional[int] = None) -> dict:
         """
@@ -91,7 +210,7 @@ class AIIntegration:
         age_val = age if age is not None else 0
         priority_val = priority if priority is not None else ''
         try:
-            ai_result = ai_manager.get_predictions(symptoms, age_val, priority_val)
+            ai_result = self.manager.get_predictions(symptoms, age_val, priority_val)
             
             # Log the prediction if enabled
             if current_app.config.get('AI_LOG_PREDICTIONS', True):
@@ -99,7 +218,8 @@ class AIIntegration:
                     prediction_type='predictive',
                     input_data={'symptoms': symptoms, 'age': age, 'priority': priority},
                     ai_result=ai_result,
-                    nurse_id=nurse_id
+                    nurse_id=nurse_id,
+                    model_version=self.manager.predictive_analytics.model_version
                 )
             
             # Format response for frontend
@@ -109,12 +229,12 @@ class AIIntegration:
                 'success': True,
                 'data': formatted_result,
                 'ai_metadata': {
-                    'model_version': ai_manager.predictive_analytics.model_version,
+                    'model_version': self.manager.predictive_analytics.model_version,
                     'processing_time': ai_result.get('processing_time', 0),
                     'condition_type': ai_result.get('condition_type')
                 }
             }
-            
+        
         except Exception as e:
             logger.error(f"AI predictive analytics error: {str(e)}")
             return {
@@ -123,10 +243,140 @@ class AIIntegration:
                 'fallback_data': self._get_standard_predictions()
             }
     
+    def process_triage(self, symptoms: str, age: Optional[int] = None, gender: Optional[str] = None,
+                       nurse_id: Optional[int] = None, patient_id: Optional[int] = None,
+                       priority: Optional[str] = None) -> dict:
+        """
+        Process a combined triage request: diagnosis, priority and outcome predictions
+        The symptoms are parsed once for both engines and the request is logged
+        as a single 'triage' prediction.
+        Args:
+            symptoms: Patient symptoms description
+            age: Patient age (optional)
+            gender: Patient gender (optional)
+            nurse_id: ID of nurse making request (optional)
+            patient_id: Patient to record the triage result against (optional)
+            priority: Triage priority, derived from diagnosis severity if omitted (optional)
+        Returns:
+            dict: AI diagnosis and prediction results with metadata
+        """
+        age_val = age if age is not None else 0
+        gender_val = gender if gender is not None else ''
+        try:
+            ai_result = self.manager.triage(symptoms, age_val, gender_val, priority)
+            diagnosis = ai_result['diagnosis']
+            predictions = ai_result['predictions']
+            processing_time = diagnosis.get('processing_time', 0) + predictions.get('processing_time', 0)
+            outcomes = predictions.get('outcome_prediction', {})
+            predicted_outcome = max(outcomes, key=outcomes.get) if outcomes else None
+            model_version = (f"{self.manager.diagnostic_engine.model_version}+"
+                             f"{self.manager.predictive_analytics.model_version}")
+            
+            # One log entry covers both engines
+            if current_app.config.get('AI_LOG_PREDICTIONS', True):
+                self._log_ai_prediction(
+                    prediction_type='triage',
+                    input_data={'symptoms': symptoms, 'age': age, 'gender': gender, 'priority': priority},
+                    ai_result={
+                        **ai_result,
+                        'confidence': diagnosis.get('confidence', 0.0),
+                        'processing_time': processing_time
+                    },
+                    nurse_id=nurse_id,
+                    model_version=model_version,
+                    patient_id=patient_id
+                )
+            
+            if patient_id is not None and nurse_id is not None:
+                self.record_triage(patient_id, nurse_id, symptoms, diagnosis, ai_result['priority'], predicted_outcome)
+            
+            return {
+                'success': True,
+                'data': {
+                    'priority': ai_result['priority'],
+                    'priority_source': ai_result['priority_source'],
+                    'diagnosis': self._format_diagnosis_response(diagnosis),
+                    'predictions': self._format_prediction_response(predictions)
+                },
+                'ai_metadata': {
+                    'model_version': model_version,
+                    'processing_time': processing_time,
+                    'confidence_threshold': current_app.config.get('AI_CONFIDENCE_THRESHOLD'),
+                    'condition_type': predictions.get('condition_type')
+                }
+            }
+        
+        except Exception as e:
+            logger.error(f"AI triage error: {str(e)}")
+            return {
+                'success': False,
+                'error': 'AI service temporarily unavailable',
+                'fallback_data': {
+                    **self._get_manual_assessment_guidance(),
+                    'predictions': self._get_standard_predictions()
+                }
+            }
+    
+    async def process_symptom_check_async(self, **kwargs) -> dict:
+        """Awaitable process_symptom_check for the ASGI handlers; runs off the event loop"""
+        return await self._run_off_loop(self.process_symptom_check, **kwargs)
+    
+    async def process_predictive_analytics_async(self, **kwargs) -> dict:
+        """Awaitable process_predictive_analytics for the ASGI handlers; runs off the event loop"""
+        return await self._run_off_loop(self.process_predictive_analytics, **kwargs)
+    
+    async def process_triage_async(self, **kwargs) -> dict:
+        """Awaitable process_triage for the ASGI handlers; runs off the event loop"""
+        return await self._run_off_loop(self.process_triage, **kwargs)
+    
+    def record_triage(self, patient_id: int, nurse_id: int, symptoms: str, ai_result: dict,
+                      priority: Optional[str] = None, predicted_outcome: Optional[str] = None):
+        """
+        Persist an AI triage result as a TriageRecord
+        In 'buffered' TRIAGE_WRITE_MODE rows are bulk-inserted by a background
+        sink, flushed on batch size or interval; otherwise they are committed inline.
+        """
+        self._write_triage_rows([
+            self._triage_row(patient_id, nurse_id, symptoms, ai_result, priority, predicted_outcome)
+        ])
+    
+    def _triage_row(self, patient_id: int, nurse_id: int, symptoms: str, ai_result: dict,
+                    priority: Optional[str] = None, predicted_outcome: Optional[str] = None) -> Optional[dict]:
+        """TriageRecord values for an AI result; None for the fallback placeholder"""
+        if ai_result.get('fallback'):
+            return None
+        diagnoses = ai_result.get('diagnosis', [])
+        return {
+            'patient_id': patient_id,
+            'nurse_id': nurse_id,
+            'symptoms': symptoms,
+            'priority': priority if priority in TRIAGE_PRIORITIES else self._derive_priority(diagnoses),
+            'diagnosis': diagnoses[0].get('condition') if diagnoses else None,
+            'ai_confidence': ai_result.get('confidence'),
+            'predicted_outcome': predicted_outcome,
+            'created_at': datetime.utcnow()
+        }
+    
+    def _write_triage_rows(self, rows: list):
+        """Queue rows on the sink in 'buffered' mode, otherwise insert them in one commit"""
+        rows = [row for row in rows if row is not None]
+        if not rows:
+            return
+        try:
+            if current_app.config.get('TRIAGE_WRITE_MODE') == 'buffered':
+                for row in rows:
+                    triage_record_sink.submit(row)
+            else:
+                db.session.add_all([TriageRecord(**row) for row in rows])
+                db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Failed to record triage result: {str(e)}")
+    
     def get_ai_health_status(self) -> dict:
         """Get health status of all AI services"""
         try:
-            health_status = ai_manager.get_service_health()
+            health_status = self.manager.get_service_health()
             
             return {
                 'success': True,
@@ -136,9 +386,13 @@ class AIIntegration:
                     'diagnostic': health_status['diagnostic_version'],
                     'predictive': health_status['predictive_version']
                 },
+                'cache': health_status['result_cache'],
+                'execution': health_status['execution'],
+                'prediction_log': prediction_log_sink.stats(),
+                'triage_records': triage_record_sink.stats(),
                 'last_updated': health_status['last_updated']
             }
-            
+        
         except Exception as e:
             logger.error(f"AI health check error: {str(e)}")
             return {
@@ -181,6 +435,10 @@ class AIIntegration:
             'disclaimer': 'These predictions are based on statistical models and should be used as guidance alongside clinical judgment.'
         }
     
+    def _derive_priority(self, diagnoses: list) -> str:
+        """Use the most severe suggested diagnosis as the triage priority"""
+        return self.manager.derive_priority(diagnoses)
+    
     def _get_confidence_label(self, confidence: float) -> str:
         """Convert confidence score to human-readable label"""
         if confidence >= 0.9:
@@ -195,27 +453,46 @@ class AIIntegration:
             return 'Very Low'
     
     def _log_ai_prediction(self, prediction_type: str, input_data: dict,
-                          ai_result: dict, nurse_id: Optional[int] = None):
-        """Log AI prediction to database for monitoring and improvement"""
+                          ai_result: dict, nurse_id: Optional[int] = None,
+                          model_version: Optional[str] = None, patient_id: Optional[int] = None):
+        """Queue AI prediction for the ai_prediction_log table; serialization happens off-thread"""
         try:
-            # Create prediction log entry (you may want to create a dedicated table for this)
-            log_entry = {
+            prediction_log_sink.submit({
                 'prediction_type': prediction_type,
-                'input_data': json.dumps(input_data),
-                'ai_result': json.dumps(ai_result),
+                'model_version': model_version,
+                'input_data': input_data,
+                'prediction_result': ai_result,
                 'nurse_id': nurse_id,
-                'timestamp': datetime.utcnow(),
-                'confidence': ai_result.get('confidence', 0.0),
-                'processing_time': ai_result.get('processing_time', 0.0)
-            }
-            
-            # For now, log to application logs
-            # In production, you'd save this to a dedicated database table
-            logger.info(f"AI Prediction Log: {json.dumps(log_entry, default=str)}")
-            
+                'patient_id': patient_id,
+                'confidence_score': ai_result.get('confidence', 0.0),
+                'processing_time': ai_result.get('processing_time', 0.0),
+                'created_at': datetime.utcnow()
+            })
         except Exception as e:
             logger.error(f"Failed to log AI prediction: {str(e)}")
     
+    async def _run_off_loop(self, func, **kwargs):
+        """Run CPU-bound AI work in a bounded thread pool, inside an app context"""
+        app = self.app
+        
+        def call():
+            with app.app_context():
+                return func(**kwargs)
+        
+        return await asyncio.get_running_loop().run_in_executor(self._get_executor(), call)
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Create the pool lazily, and again in a forked child where pool threads do not survive"""
+        pid = os.getpid()
+        if self._executor_pid != pid:
+            with self._executor_lock:
+                if self._executor_pid != pid:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.app.config['AI_ASYNC_WORKERS'], thread_name_prefix='ai-async'
+                    )
+                    self._executor_pid = pid
+        return self._executor
+    
     def _get_manual_assessment_guidance(self) -> dict:
         """Provide manual assessment guidance when AI fails"""
         return {
@@ -5,17 +5,247 @@ Provides core AI functionality and service abstractions
 """
 
 import json
+import os
+import re
+import threading
 import numpy as np
 import logging
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from bisect import bisect_left
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Dict, List, Tuple, Optional, Any
+from typing import Dict, List, Tuple, Optional, Any, Iterable, FrozenSet
 from dataclasses import dataclass
 from abc import ABC, abstractmethod
+from time import perf_counter
+
+from metrics import ai_stage_seconds
+from process_pools import pool_context
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Symptom vocabulary used by the diagnostic engine, grouped by medical category
+SYMPTOM_KEYWORDS = {
+    'respiratory': ['cough', 'shortness of breath', 'dyspnea', 'wheezing', 'chest pain'],
+    'cardiac': ['chest pain', 'palpitations', 'heart racing', 'irregular heartbeat'],
+    'neurological': ['headache', 'dizziness', 'confusion', 'seizure', 'weakness'],
+    'gastrointestinal': ['nausea', 'vomiting', 'diarrhea', 'abdominal pain'],
+    'infectious': ['fever', 'chills', 'fatigue', 'body aches', 'sore throat']
+}
+
+# Severity labels, indexed by the severity codes used in vectorized scoring
+SEVERITY_LEVELS = ('Low', 'Medium', 'High')
+
+# Triage priorities, indexed by the priority codes of the outcome table;
+# any other priority is scored as Medium
+PRIORITY_LEVELS = ('High', 'Medium', 'Low')
+
+# Columnar PredictiveAnalytics outputs: (column, outcome fragment index, fragment key)
+OUTCOME_COLUMNS = (
+    ('recovery_days', 0, 'estimated_days'),
+    ('recovery_confidence', 0, 'confidence'),
+    ('recovery_range_min', 0, 'range_min'),
+    ('recovery_range_max', 0, 'range_max'),
+    ('risk_level', 1, 'risk_level'),
+    ('risk_probability', 1, 'probability'),
+    ('bed_days', 2, 'bed_days'),
+    ('specialist_required', 2, 'specialist_required'),
+    ('follow_up_visits', 2, 'follow_up_visits'),
+    ('estimated_cost', 2, 'estimated_cost'),
+    ('full_recovery', 3, 'full_recovery'),
+    ('partial_recovery', 3, 'partial_recovery'),
+    ('chronic_condition', 3, 'chronic_condition')
+)
+
+# Keywords used by predictive analytics to pick a condition type, in priority order
+CONDITION_TYPE_KEYWORDS = [
+    ('cardiac', ['chest pain', 'heart', 'cardiac']),
+    ('respiratory', ['cough', 'breathing', 'respiratory']),
+    ('neurological', ['headache', 'dizziness', 'neurological']),
+    ('infectious', ['fever', 'infection', 'chills'])
+]
+
+class SymptomMatcher:
+    """Compiled multi-keyword matcher for symptom text.
+    
+    All keywords are folded into a single alternation regex wrapped in a
+    lookahead, so one scan of the text reports every keyword occurrence,
+    including overlapping ones. Keywords that are prefixes of a longer
+    keyword matched at the same position are added from a precomputed
+    table, which keeps the result identical to ``keyword in text`` checks.
+    """
+    
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords = tuple(dict.fromkeys(keyword.lower() for keyword in keywords))
+        # Longest alternatives first so each position reports its longest match
+        alternation = '|'.join(
+            re.escape(keyword) for keyword in sorted(self.keywords, key=len, reverse=True)
+        )
+        self._pattern = re.compile(f'(?=({alternation}))')
+        self._prefixes = {
+            keyword: frozenset(other for other in self.keywords if keyword.startswith(other))
+            for keyword in self.keywords
+        }
+    
+    def find(self, text: str) -> FrozenSet[str]:
+        """Return every keyword contained in already-lowercased text"""
+        longest = set(self._pattern.findall(text))
+        if not longest:
+            return frozenset()
+        return frozenset().union(*(self._prefixes[keyword] for keyword in longest))
+
+@dataclass(frozen=True)
+class ParsedSymptoms:
+    """Symptom text parsed once per request and shared by the AI engines.
+    
+    Produced by SymptomParser.parse. Engines read the matched keywords and
+    category bits instead of scanning the text again; being immutable and
+    hashable, one parse can be handed to several engines and used as a
+    cache key.
+    """
+    text: str                      # stripped, lowercased input
+    keyword_ids: FrozenSet[int]    # indexes into the parser's matcher.keywords
+    keywords: FrozenSet[str]
+    category_mask: int             # bit i: a keyword of SYMPTOM_KEYWORDS category i matched
+    condition_type_mask: int       # bit i: a keyword of CONDITION_TYPE_KEYWORDS entry i matched
+
+class SymptomParser:
+    """Single parse stage for symptom text over the engines' shared vocabulary"""
+    
+    def __init__(self, symptom_keywords: Dict[str, List[str]] = SYMPTOM_KEYWORDS,
+                 condition_type_keywords: List[Tuple[str, List[str]]] = CONDITION_TYPE_KEYWORDS):
+        self.categories = tuple(symptom_keywords)
+        self.condition_types = tuple(condition_type for condition_type, _ in condition_type_keywords)
+        self.matcher = SymptomMatcher(
+            [keyword for keywords in symptom_keywords.values() for keyword in keywords] +
+            [keyword for _, keywords in condition_type_keywords for keyword in keywords]
+        )
+        self._keyword_ids = {keyword: i for i, keyword in enumerate(self.matcher.keywords)}
+        
+        # Per-keyword bits, so a parse only ORs together the bits of its hits
+        self._category_bits = dict.fromkeys(self.matcher.keywords, 0)
+        for bit, keywords in enumerate(symptom_keywords.values()):
+            for keyword in keywords:
+                self._category_bits[keyword.lower()] |= 1 << bit
+        self._condition_type_bits = dict.fromkeys(self.matcher.keywords, 0)
+        for bit, (_, keywords) in enumerate(condition_type_keywords):
+            for keyword in keywords:
+                self._condition_type_bits[keyword.lower()] |= 1 << bit
+    
+    def parse(self, symptoms: str) -> ParsedSymptoms:
+        text = symptoms.strip().lower()
+        keywords = self.matcher.find(text)
+        category_mask = condition_type_mask = 0
+        for keyword in keywords:
+            category_mask |= self._category_bits[keyword]
+            condition_type_mask |= self._condition_type_bits[keyword]
+        return ParsedSymptoms(
+            text=text,
+            keyword_ids=frozenset(self._keyword_ids[keyword] for keyword in keywords),
+            keywords=keywords,
+            category_mask=category_mask,
+            condition_type_mask=condition_type_mask
+        )
+    
+    def condition_type(self, parsed: ParsedSymptoms) -> str:
+        """First condition type, in priority order, with a matched keyword"""
+        mask = parsed.condition_type_mask
+        if not mask:
+            return 'general'
+        return self.condition_types[(mask & -mask).bit_length() - 1]
+
+# Parser shared by the diagnostic and predictive engines
+symptom_parser = SymptomParser()
+symptom_matcher = symptom_parser.matcher
+
+class FrozenDict(dict):
+    """Read-only dict for result fragments shared between callers.
+    
+    A dict subclass so it serializes to JSON and compares like a plain dict;
+    every mutating method raises TypeError. ``copy()`` returns a plain dict.
+    """
+    
+    __slots__ = ()
+    
+    def _immutable(self, *args, **kwargs):
+        raise TypeError(f"{type(self).__name__} is read-only")
+    
+    __setitem__ = __delitem__ = __ior__ = _immutable
+    clear = pop = popitem = setdefault = update = _immutable
+    
+    def copy(self) -> Dict:
+        return dict(self)
+    
+    def __reduce__(self):
+        # Pickle from a plain dict; the default protocol would call __setitem__
+        return (type(self), (dict(self),))
+
+class LRUResultCache:
+    """Thread-safe, size-bounded LRU cache for AI results.
+    
+    Cached values are shared between callers and must not be mutated.
+    """
+    
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+    
+    def get(self, key) -> Optional[Dict]:
+        """Return the cached value for key, or None on a miss"""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+    
+    def put(self, key, value: Dict):
+        """Store a value, evicting the least recently used entries past max_size"""
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def resize(self, max_size: int):
+        """Change the size bound, evicting entries that no longer fit"""
+        with self._lock:
+            self.max_size = max_size
+            while self._entries and len(self._entries) > max(max_size, 0):
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def clear(self):
+        """Drop every entry, counting it as an invalidation"""
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+    
+    def stats(self) -> Dict:
+        """Get cache counters for health reporting"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0
+            }
+
 @dataclass
 class DiagnosisResult:
     """Data class for diagnosis results"""
@@ -37,10 +267,11 @@ class PredictionResult:
 class BaseAIService(ABC):
     """Abstract base class for AI services"""
     
-    def __init__(self, model_version: str = "v1.0"):
+    def __init__(self, model_version: str = "v1.0", parser: Optional[SymptomParser] = None):
         self.model_version = model_version
         self.confidence_threshold = 0.7
         self.created_at = datetime.now()
+        self.parser = parser or symptom_parser
     
     @abstractmethod
     def process(self, input_data: Dict) -> Dict:
@@ -51,8 +282,16 @@ class BaseAIService(ABC):
         """Validate input data contains required fields"""
         return all(field in input_data for field in required_fields)
     
+    def parse_symptoms(self, symptoms) -> ParsedSymptoms:
+        """Parse raw symptom text, passing an existing ParsedSymptoms through"""
+        if isinstance(symptoms, ParsedSymptoms):
+            return symptoms
+        return self.parser.parse(symptoms)
+    
     def log_prediction(self, input_data: Dict, result: Dict, processing_time: float):
-        """Log prediction for monitoring and improvement"""
+        """Log prediction at debug level; the integration layer writes the audit record"""
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
         log_entry = {
             'timestamp': datetime.now().isoformat(),
             'model_version': self.model_version,
@@ -60,20 +299,21 @@ class BaseAIService(ABC):
             'input_hash': hash(str(input_data)),
             'confidence': result.get('confidence', 0.0)
         }
-        logger.info(f"AI Prediction logged: {log_entry}")
+        logger.debug(f"AI Prediction logged: {log_entry}")
 
 class DiagnosticEngine(BaseAIService):
     """AI-powered diagnostic engine for symptom analysis"""
     
-    def __init__(self):
-        super().__init__("diagnostic_v1.0")
-        self.symptom_keywords = {
-            'respiratory': ['cough', 'shortness of breath', 'dyspnea', 'wheezing', 'chest pain'],
-            'cardiac': ['chest pain', 'palpitations', 'heart racing', 'irregular heartbeat'],
-            'neurological': ['headache', 'dizziness', 'confusion', 'seizure', 'weakness'],
-            'gastrointestinal': ['nausea', 'vomiting', 'diarrhea', 'abdominal pain'],
-            'infectious': ['fever', 'chills', 'fatigue', 'body aches', 'sore throat']
-        }
+    # Integer ages with the same result share a bucket (split at <5, >50, >65)
+    age_bucket_edges = (4, 50, 65)
+    
+    def __init__(self, parser: Optional[SymptomParser] = None):
+        super().__init__("diagnostic_v1.0", parser)
+        self.symptom_keywords = SYMPTOM_KEYWORDS
+        self._keyword_categories: Dict[str, List[str]] = {}
+        for category, keywords in self.symptom_keywords.items():
+            for keyword in keywords:
+                self._keyword_categories.setdefault(keyword, []).append(category)
         
         self.condition_database = {
             'respiratory': [
@@ -93,96 +333,202 @@ class DiagnosticEngine(BaseAIService):
                 {'name': 'Vertigo', 'severity': 'Medium', 'base_confidence': 0.7}
             ]
         }
+        self._build_condition_arrays()
+    
+    def _build_condition_arrays(self):
+        """Flatten keyword and condition tables into arrays for vectorized scoring"""
+        self._categories = list(self.symptom_keywords.keys())
+        self._keyword_index = {keyword: i for i, keyword in enumerate(self._keyword_categories)}
+        
+        # keyword x category incidence matrix turns keyword hits into category counts
+        self._keyword_category_matrix = np.zeros((len(self._keyword_index), len(self._categories)))
+        for keyword, categories in self._keyword_categories.items():
+            for category in categories:
+                self._keyword_category_matrix[self._keyword_index[keyword], self._categories.index(category)] = 1.0
+        self._category_sizes = np.array([len(self.symptom_keywords[c]) for c in self._categories], dtype=float)
+        
+        # Conditions flattened in category order, matching the scalar iteration order
+        self._condition_names: List[str] = []
+        severity_codes, category_index, base_confidence = [], [], []
+        for index, category in enumerate(self._categories):
+            for condition in self.condition_database.get(category, []):
+                self._condition_names.append(condition['name'])
+                severity_codes.append(SEVERITY_LEVELS.index(condition['severity']))
+                category_index.append(index)
+                base_confidence.append(condition['base_confidence'])
+        self._condition_severity_codes = np.array(severity_codes, dtype=np.intp)
+        self._condition_categories = np.array(category_index, dtype=np.intp)
+        self._condition_base_confidence = np.array(base_confidence, dtype=float)
     
     def process(self, input_data: Dict) -> Dict:
-        """Process symptoms and return diagnostic suggestions"""
+        """Process symptoms (raw text or ParsedSymptoms) and return diagnostic suggestions"""
         if not self.validate_input(input_data, ['symptoms']):
             raise ValueError("Missing required field: symptoms")
-        
+        result = self.diagnose(
+            self.parse_symptoms(input_data['symptoms']),
+            input_data.get('age', 30),
+            input_data.get('gender', 'Unknown')
+        )
+        self.log_prediction(input_data, result, result['processing_time'])
+        return result
+    
+    def diagnose(self, parsed: ParsedSymptoms, age: int = 30, gender: str = 'Unknown') -> Dict:
+        """Diagnostic suggestions for already-parsed symptoms"""
         start_time = datetime.now()
         
-        symptoms = input_data['symptoms'].lower()
-        age = input_data.get('age', 30)
-        gender = input_data.get('gender', 'Unknown')
-        
         # Analyze symptom categories
-        category_scores = self._analyze_symptom_categories(symptoms)
+        stage_start = perf_counter()
+        category_scores = self._analyze_symptom_categories(parsed)
+        analyzed = perf_counter()
         
         # Generate diagnoses
         diagnoses = self._generate_diagnoses(category_scores, age, gender)
+        diagnosed = perf_counter()
         
         # Generate recommendations
         recommendations = self._generate_recommendations(diagnoses)
+        recommended = perf_counter()
+        
+        ai_stage_seconds.observe(analyzed - stage_start, engine='DiagnosticEngine', stage='analyze')
+        ai_stage_seconds.observe(diagnosed - analyzed, engine='DiagnosticEngine', stage='diagnose')
+        ai_stage_seconds.observe(recommended - diagnosed, engine='DiagnosticEngine', stage='recommend')
         
         processing_time = (datetime.now() - start_time).total_seconds()
         
-        result = {
+        return {
             'diagnosis': diagnoses,
             'recommendations': recommendations,
             'confidence': max([d['confidence'] for d in diagnoses]) if diagnoses else 0.0,
             'processing_time': processing_time
         }
-        
-        self.log_prediction(input_data, result, processing_time)
-        return result
     
-    def _analyze_symptom_categories(self, symptoms: str) -> Dict[str, float]:
-        """Analyze symptoms and score by medical category"""
-        category_scores = {}
+    def process_batch(self, records: List[Dict]) -> List[Dict]:
+        """Process a batch of symptom records in one vectorized pass"""
+        for input_data in records:
+            if not self.validate_input(input_data, ['symptoms']):
+                raise ValueError("Missing required field: symptoms")
+        results = self.diagnose_batch(
+            [self.parse_symptoms(input_data['symptoms']) for input_data in records],
+            [input_data.get('age', 30) for input_data in records]
+        )
+        if results:
+            self.log_prediction(
+                {'batch_size': len(records)},
+                {'confidence': max(r['confidence'] for r in results)},
+                sum(r['processing_time'] for r in results)
+            )
+        return results
+    
+    def diagnose_batch(self, parsed: List[ParsedSymptoms], ages: List[int]) -> List[Dict]:
+        """Diagnostic suggestions for a batch of parses and their ages, in order"""
+        if not parsed:
+            return []
         
-        for category, keywords in self.symptom_keywords.items():
-            score = 0.0
-            keyword_count = 0
-            
-            for keyword in keywords:
-                if keyword in symptoms:
-                    score += 1.0
-                    keyword_count += 1
-            
-            if keyword_count > 0:
-                category_scores[category] = min(score / len(keywords), 1.0)
+        start_time = datetime.now()
+        
+        # Keyword hits per record, folded into (batch x category) scores
+        stage_start = perf_counter()
+        hits = np.zeros((len(parsed), len(self._keyword_index)))
+        for row, record in enumerate(parsed):
+            for keyword in record.keywords:
+                column = self._keyword_index.get(keyword)
+                if column is not None:
+                    hits[row, column] = 1.0
+        category_scores = np.minimum(hits @ self._keyword_category_matrix / self._category_sizes, 1.0)
+        ages = np.array(ages, dtype=float)
+        analyzed = perf_counter()
+        
+        rounded, eligible = self._score_conditions(category_scores, ages)
+        batch_diagnoses = self._rank_diagnoses(rounded, eligible)
+        diagnosed = perf_counter()
+        
+        batch_recommendations = [self._generate_recommendations(diagnoses) for diagnoses in batch_diagnoses]
+        recommended = perf_counter()
+        
+        ai_stage_seconds.observe(analyzed - stage_start, engine='DiagnosticEngine', stage='analyze_batch')
+        ai_stage_seconds.observe(diagnosed - analyzed, engine='DiagnosticEngine', stage='diagnose_batch')
+        ai_stage_seconds.observe(recommended - diagnosed, engine='DiagnosticEngine', stage='recommend_batch')
+        
+        processing_time = (datetime.now() - start_time).total_seconds()
         
-        return category_scores
+        return [{
+            'diagnosis': diagnoses,
+            'recommendations': recommendations,
+            'confidence': max([d['confidence'] for d in diagnoses]) if diagnoses else 0.0,
+            'processing_time': processing_time / len(parsed)
+        } for diagnoses, recommendations in zip(batch_diagnoses, batch_recommendations)]
     
-    def _generate_diagnoses(self, category_scores: Dict[str, float], age: int, gender: str) -> List[Dict]:
-        """Generate potential diagnoses based on symptom analysis"""
-        diagnoses = []
+    def _score_conditions(self, category_scores: np.ndarray, ages: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Score every condition for every row of a (batch x category) score matrix"""
+        symptom_scores = category_scores[:, self._condition_categories]
         
-        for category, score in category_scores.items():
-            if category in self.condition_database and score > 0.3:
-                for condition in self.condition_database[category]:
-                    confidence = self._calculate_confidence(
-                        condition['base_confidence'], score, age, gender
-                    )
-                    
-                    if confidence >= self.confidence_threshold:
-                        diagnoses.append({
-                            'condition': condition['name'],
-                            'confidence': round(confidence, 3),
-                            'severity': condition['severity'],
-                            'category': category
-                        })
-        
-        # Sort by confidence
-        diagnoses.sort(key=lambda x: x['confidence'], reverse=True)
-        return diagnoses[:5]  # Return top 5 diagnoses
-    
-    def _calculate_confidence(self, base_confidence: float, symptom_score: float, 
-                            age: int, gender: str) -> float:
-        """Calculate diagnostic confidence with demographic factors"""
-        # Age factor (elderly and very young are higher risk)
-        age_factor = 1.0
-        if age > 65 or age < 5:
-            age_factor = 1.1
-        elif age > 50:
-            age_factor = 1.05
+        # Age factor (elderly and very young are higher risk), one value per row
+        age_factors = np.where((ages > 65) | (ages < 5), 1.1, np.where(ages > 50, 1.05, 1.0))
         
         # Gender factor (condition-specific adjustments)
         gender_factor = 1.0
         
-        # Combine factors
-        confidence = base_confidence * symptom_score * age_factor * gender_factor
-        return min(confidence, 0.98)  # Cap at 98% confidence
+        # Combine factors for every (row, condition) pair, capped at 98% confidence
+        confidence = self._condition_base_confidence * symptom_scores * age_factors[:, None] * gender_factor
+        confidence = np.minimum(confidence, 0.98)
+        eligible = (symptom_scores > 0.3) & (confidence >= self.confidence_threshold)
+        
+        # Round eligible entries with Python's round() so ties match the scalar path exactly
+        rounded = np.full(confidence.shape, -np.inf)
+        rows, columns = np.nonzero(eligible)
+        rounded[rows, columns] = [round(float(c), 3) for c in confidence[rows, columns]]
+        return rounded, eligible
+    
+    def _rank_diagnoses(self, rounded: np.ndarray, eligible: np.ndarray, limit: int = 5) -> List[List[Dict]]:
+        """Pick the top diagnoses per row, ties keeping condition table order"""
+        count = rounded.shape[1]
+        
+        # Unique integer key: confidence in thousandths, then earlier conditions first
+        milli = np.rint(np.where(eligible, rounded, 0.0) * 1000).astype(np.int64)
+        keys = np.where(eligible, milli * count + (count - 1 - np.arange(count)), -1)
+        
+        rows = np.arange(keys.shape[0])[:, None]
+        if count > limit:
+            top = np.argpartition(-keys, limit - 1, axis=1)[:, :limit]
+        else:
+            top = np.broadcast_to(np.arange(count), keys.shape)
+        order = top[rows, np.argsort(-keys[rows, top], axis=1)]
+        
+        batch_diagnoses = []
+        for row, columns in enumerate(order):
+            batch_diagnoses.append([{
+                'condition': self._condition_names[column],
+                'confidence': float(rounded[row, column]),
+                'severity': SEVERITY_LEVELS[self._condition_severity_codes[column]],
+                'category': self._categories[self._condition_categories[column]]
+            } for column in columns if eligible[row, column]])
+        return batch_diagnoses
+    
+    def _analyze_symptom_categories(self, parsed: ParsedSymptoms) -> Dict[str, float]:
+        """Analyze symptoms and score by medical category"""
+        if not parsed.category_mask:
+            return {}
+        keyword_counts: Dict[str, int] = {}
+        for keyword in parsed.keywords:
+            for category in self._keyword_categories.get(keyword, ()):
+                keyword_counts[category] = keyword_counts.get(category, 0) + 1
+        
+        # Keep category order stable so tied diagnoses sort deterministically
+        return {
+            category: min(keyword_counts[category] / len(keywords), 1.0)
+            for category, keywords in self.symptom_keywords.items()
+            if category in keyword_counts
+        }
+    
+    def _generate_diagnoses(self, category_scores: Dict[str, float], age: int, gender: str) -> List[Dict]:
+        """Generate potential diagnoses based on symptom analysis"""
+        # Nothing can qualify without a scored category, so skip the array work
+        if not any(score > 0.3 for category, score in category_scores.items()
+                   if category in self.condition_database):
+            return []
+        scores = np.array([[category_scores.get(c, 0.0) for c in self._categories]])
+        rounded, eligible = self._score_conditions(scores, np.array([age], dtype=float))
+        return self._rank_diagnoses(rounded, eligible)[0]  # Return top 5 diagnoses
     
     def _generate_recommendations(self, diagnoses: List[Dict]) -> List[str]:
         """Generate clinical recommendations based on diagnoses"""
@@ -214,36 +560,105 @@ class DiagnosticEngine(BaseAIService):
 class PredictiveAnalytics(BaseAIService):
     """AI-powered predictive analytics for healthcare outcomes"""
     
-    def __init__(self):
-        super().__init__("predictive_v1.0")
+    # Integer ages with the same result share a bucket (split at <18, >60, >65, >70)
+    age_bucket_edges = (17, 60, 65, 70)
+    
+    # One age inside each bracket (<18, 18-60, 61-65, 66-70, >70), used to fill the outcome table
+    age_bracket_ages = (10, 30, 63, 68, 80)
+    
+    # np.digitize bins giving the same brackets: age >= 18, then age > 60, > 65, > 70
+    age_bracket_bins = np.array([18.0, np.nextafter(60.0, np.inf), np.nextafter(65.0, np.inf),
+                                 np.nextafter(70.0, np.inf)])
+    
+    def __init__(self, parser: Optional[SymptomParser] = None):
+        super().__init__("predictive_v1.0", parser)
+        self.condition_type_keywords = CONDITION_TYPE_KEYWORDS
         self.recovery_models = {
             'respiratory': {'base_days': 7, 'variance': 3, 'complications_risk': 0.15},
             'cardiac': {'base_days': 14, 'variance': 7, 'complications_risk': 0.25},
             'neurological': {'base_days': 21, 'variance': 10, 'complications_risk': 0.20},
             'infectious': {'base_days': 5, 'variance': 2, 'complications_risk': 0.10}
         }
+        self.build_outcome_table()
+    
+    def build_outcome_table(self):
+        """
+        Precompute every prediction for (condition type, age bracket, priority)
+        The outcome models only compare age against fixed thresholds and treat
+        unknown condition types as 'general', so this table covers every input.
+        Call again after changing recovery_models.
+        """
+        self.condition_types = tuple(self.recovery_models) + ('general',)
+        self.outcome_table: Dict[Tuple[str, int, int], Tuple[FrozenDict, ...]] = {}
+        for condition_type in self.condition_types:
+            for bracket, age in enumerate(self.age_bracket_ages):
+                for code, priority in enumerate(PRIORITY_LEVELS):
+                    self.outcome_table[(condition_type, bracket, code)] = tuple(
+                        FrozenDict(fragment) for fragment in self._compute_outcomes(condition_type, age, priority)
+                    )
+        
+        # The same table as (condition type x age bracket x priority) arrays for process_batch
+        self._outcome_columns = {
+            column: np.array([[[self.outcome_table[(condition_type, bracket, code)][fragment][key]
+                                for code in range(len(PRIORITY_LEVELS))]
+                               for bracket in range(len(self.age_bracket_ages))]
+                              for condition_type in self.condition_types])
+            for column, fragment, key in OUTCOME_COLUMNS
+        }
+    
+    @staticmethod
+    def age_bracket(age) -> int:
+        """Index of the age bracket: <18, 18-60, 61-65, 66-70, >70"""
+        # Same comparisons as the models, so an unordered age (NaN) lands in 18-60 as it does there
+        if age > 70:
+            return 4
+        if age > 65:
+            return 3
+        if age > 60:
+            return 2
+        if age < 18:
+            return 0
+        return 1
+    
+    def lookup_outcomes(self, condition_type: str, age, priority) -> Tuple[FrozenDict, ...]:
+        """Shared (recovery, risk, resources, outcomes) fragments for one patient"""
+        if condition_type not in self.recovery_models:
+            condition_type = 'general'
+        code = PRIORITY_LEVELS.index(priority) if priority in PRIORITY_LEVELS else 1
+        return self.outcome_table[(condition_type, self.age_bracket(age), code)]
     
     def process(self, input_data: Dict) -> Dict:
-        """Process patient data and return outcome predictions"""
+        """Process patient data (symptoms as raw text or ParsedSymptoms) and return outcome predictions"""
         if not self.validate_input(input_data, ['symptoms']):
             raise ValueError("Missing required field: symptoms")
-        
+        result = self.predict(
+            self.parse_symptoms(input_data['symptoms']),
+            input_data.get('age', 30),
+            input_data.get('priority', 'Medium')
+        )
+        self.log_prediction(input_data, result, result['processing_time'])
+        return result
+    
+    def predict(self, parsed: ParsedSymptoms, age: int = 30, priority: str = 'Medium') -> Dict:
+        """Outcome predictions for already-parsed symptoms"""
         start_time = datetime.now()
         
         # Classify condition type
-        condition_type = self._classify_condition_type(input_data['symptoms'])
-        age = input_data.get('age', 30)
-        priority = input_data.get('priority', 'Medium')
+        stage_start = perf_counter()
+        condition_type = self._classify_condition_type(parsed)
+        classified = perf_counter()
         
-        # Generate predictions
-        recovery_prediction = self._predict_recovery_time(condition_type, age, priority)
-        risk_assessment = self._assess_complications_risk(condition_type, age)
-        resource_needs = self._predict_resource_requirements(condition_type, recovery_prediction)
-        outcome_probabilities = self._calculate_outcome_probabilities(condition_type, age)
+        # Look up the precomputed predictions
+        recovery_prediction, risk_assessment, resource_needs, outcome_probabilities = \
+            self.lookup_outcomes(condition_type, age, priority)
+        predicted = perf_counter()
+        
+        ai_stage_seconds.observe(classified - stage_start, engine='PredictiveAnalytics', stage='classify')
+        ai_stage_seconds.observe(predicted - classified, engine='PredictiveAnalytics', stage='predict')
         
         processing_time = (datetime.now() - start_time).total_seconds()
         
-        result = {
+        return {
             'recovery_time': recovery_prediction,
             'complications_risk': risk_assessment,
             'resource_needs': resource_needs,
@@ -251,25 +666,80 @@ class PredictiveAnalytics(BaseAIService):
             'condition_type': condition_type,
             'processing_time': processing_time
         }
+    
+    def process_batch(self, condition_codes, ages, priorities) -> Dict[str, np.ndarray]:
+        """
+        Columnar predictions for a cohort, e.g. re-scoring a whole ward
+        Args:
+            condition_codes: Indexes into condition_types (see condition_codes/classify_batch)
+            ages: Patient ages
+            priorities: Priority labels, or codes indexing PRIORITY_LEVELS;
+                any other label is scored as Medium
+        Returns:
+            Dict of equal-length arrays, one per OUTCOME_COLUMNS entry plus condition_type
+        Raises:
+            ValueError: If the lengths differ or a code is out of range
+        """
+        stage_start = perf_counter()
+        condition_codes = np.asarray(condition_codes, dtype=np.intp)
+        ages = np.asarray(ages, dtype=float)
+        if condition_codes.shape != ages.shape:
+            raise ValueError("condition_codes and ages must have the same length")
+        # Negative codes would wrap around to other rows of the outcome table
+        if np.any((condition_codes < 0) | (condition_codes >= len(self.condition_types))):
+            raise ValueError(f"condition_codes must be in range(0, {len(self.condition_types)})")
         
-        self.log_prediction(input_data, result, processing_time)
-        return result
+        # NaN compares false against every threshold in the models, which means 18-60
+        brackets = np.where(np.isnan(ages), 1, np.digitize(ages, self.age_bracket_bins))
+        priority_codes = self._priority_codes(priorities, ages.shape)
+        columns = {
+            column: values[condition_codes, brackets, priority_codes]
+            for column, values in self._outcome_columns.items()
+        }
+        columns['condition_type'] = np.array(self.condition_types)[condition_codes]
+        
+        ai_stage_seconds.observe(perf_counter() - stage_start, engine='PredictiveAnalytics', stage='predict_batch')
+        return columns
     
-    def _classify_condition_type(self, symptoms: str) -> str:
-        """Classify the primary condition type from symptoms"""
-        symptoms_lower = symptoms.lower()
-        
-        # Simple keyword-based classification
-        if any(keyword in symptoms_lower for keyword in ['chest pain', 'heart', 'cardiac']):
-            return 'cardiac'
-        elif any(keyword in symptoms_lower for keyword in ['cough', 'breathing', 'respiratory']):
-            return 'respiratory'
-        elif any(keyword in symptoms_lower for keyword in ['headache', 'dizziness', 'neurological']):
-            return 'neurological'
-        elif any(keyword in symptoms_lower for keyword in ['fever', 'infection', 'chills']):
-            return 'infectious'
-        else:
-            return 'general'
+    def condition_codes(self, condition_types: Iterable[str]) -> np.ndarray:
+        """Codes for process_batch; unknown condition types map to 'general'"""
+        index = {condition_type: code for code, condition_type in enumerate(self.condition_types)}
+        general = index['general']
+        return np.array([index.get(condition_type, general) for condition_type in condition_types], dtype=np.intp)
+    
+    def classify_batch(self, symptoms: Iterable) -> np.ndarray:
+        """Condition codes for process_batch from symptom text or ParsedSymptoms"""
+        return self.condition_codes(self._classify_condition_type(s) for s in symptoms)
+    
+    @staticmethod
+    def _priority_codes(priorities, shape) -> np.ndarray:
+        priorities = np.asarray(priorities)
+        if priorities.shape != shape:
+            raise ValueError("priorities and ages must have the same length")
+        if priorities.dtype.kind in 'iu':
+            if np.any((priorities < 0) | (priorities >= len(PRIORITY_LEVELS))):
+                raise ValueError(f"Priority codes must be in range(0, {len(PRIORITY_LEVELS)})")
+            return priorities.astype(np.intp)
+        return np.select(
+            [priorities == level for level in PRIORITY_LEVELS],
+            range(len(PRIORITY_LEVELS)),
+            default=1
+        ).astype(np.intp)
+    
+    def _classify_condition_type(self, symptoms) -> str:
+        """Classify the primary condition type from symptoms (text or ParsedSymptoms)"""
+        # Simple keyword-based classification, first matching type wins
+        return self.parser.condition_type(self.parse_symptoms(symptoms))
+    
+    def _compute_outcomes(self, condition_type: str, age: int, priority: str) -> Tuple[Dict, Dict, Dict, Dict]:
+        """Run the outcome models directly; the source of the outcome table"""
+        recovery_prediction = self._predict_recovery_time(condition_type, age, priority)
+        return (
+            recovery_prediction,
+            self._assess_complications_risk(condition_type, age),
+            self._predict_resource_requirements(condition_type, recovery_prediction),
+            self._calculate_outcome_probabilities(condition_type, age)
+        )
     
     def _predict_recovery_time(self, condition_type: str, age: int, priority: str) -> Dict:
         """Predict patient recovery time"""
@@ -376,10 +846,13 @@ class PredictiveAnalytics(BaseAIService):
             'chronic_condition': round(normalized_probs['chronic'], 3)
         }
 
+EXECUTION_BACKENDS = ('inline', 'process')
+
 class AIServiceManager:
     """Manager class for coordinating AI services"""
     
-    def __init__(self):
+    def __init__(self, cache_size: int = 1024, execution_backend: str = 'inline',
+                 process_workers: Optional[int] = None, chunk_size: int = 256):
         self.diagnostic_engine = DiagnosticEngine()
         self.predictive_analytics = PredictiveAnalytics()
         self.service_status = {
@@ -387,42 +860,231 @@ class AIServiceManager:
             'predictive': True,
             'voice': False  # Not yet implemented
         }
+        self.result_cache = LRUResultCache(cache_size)
+        self._cached_versions = self._model_versions()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_pid: Optional[int] = None
+        self._pool_lock = threading.Lock()
+        self.configure_execution(execution_backend, process_workers, chunk_size)
+    
+    def configure_execution(self, backend: str = 'inline', workers: Optional[int] = None, chunk_size: int = 256):
+        """
+        Choose where AI calls run
+        'inline' runs them on the calling thread. 'process' sends them to a pool
+        of worker processes, each holding its own engines and result cache, so
+        scoring on one request thread does not hold the GIL for the others.
+        Batch calls are split into chunk_size records per task.
+        """
+        if backend not in EXECUTION_BACKENDS:
+            raise ValueError(f"Execution backend must be one of {', '.join(EXECUTION_BACKENDS)}, got {backend!r}")
+        self.shutdown()
+        self.execution_backend = backend
+        self.process_workers = max(int(workers or os.cpu_count() or 1), 1)
+        self.chunk_size = max(int(chunk_size), 1)
+    
+    def start_pool(self):
+        """Start the 'process' backend's worker pool now rather than on the first call"""
+        if self.execution_backend == 'process':
+            self._ensure_pool()
+    
+    def shutdown(self):
+        """Stop the worker pool; a new one is started on next use"""
+        with self._pool_lock:
+            pool, self._pool, self._pool_pid = self._pool, None, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+    
+    def get_diagnosis(self, symptoms, age: Optional[int] = None, gender: Optional[str] = None) -> Dict:
+        """Get AI-powered diagnosis for symptom text or ParsedSymptoms"""
+        return self._run('_get_diagnosis', symptoms, age, gender)
     
-    def get_diagnosis(self, symptoms: str, age: Optional[int] = None, gender: Optional[str] = None) -> Dict:
-        """Get AI-powered diagnosis"""
+    def get_diagnoses_batch(self, records: List[Dict]) -> List[Dict]:
+        """Get AI-powered diagnoses for a batch of (symptoms, age, gender) records, in order"""
+        return self._run_chunked('_get_diagnoses_batch', records)
+    
+    def get_predictions(self, symptoms, age: Optional[int] = None, priority: Optional[str] = None) -> Dict:
+        """Get AI-powered outcome predictions for symptom text or ParsedSymptoms"""
+        return self._run('_get_predictions', symptoms, age, priority)
+    
+    def get_predictions_batch(self, records: List[Dict]) -> List[Dict]:
+        """Get AI-powered outcome predictions for a batch of (symptoms, age, priority) records, in order"""
+        return self._run_chunked('_get_predictions_batch', records)
+    
+    def triage(self, symptoms, age: Optional[int] = None, gender: Optional[str] = None,
+               priority: Optional[str] = None) -> Dict:
+        """
+        Diagnosis, triage priority and outcome predictions from a single symptom parse
+        Without a valid priority (High, Medium or Low), the most severe suggested
+        diagnosis sets it, and the predictions are made for that priority.
+        """
+        return self._run('_triage', symptoms, age, gender, priority)
+    
+    def _get_diagnosis(self, symptoms, age: Optional[int] = None, gender: Optional[str] = None) -> Dict:
         try:
-            input_data = {'symptoms': symptoms}
-            if age is not None:
-                input_data['age'] = str(age)
-            if gender is not None:
-                input_data['gender'] = gender
-            return self.diagnostic_engine.process(input_data)
+            parsed = self.diagnostic_engine.parse_symptoms(symptoms)
+            age = int(age) if age is not None else None
+            
+            # Results depend only on the matched keywords and the age bucket;
+            # gender does not affect the diagnostic engine, so it is left out of the key
+            cache_key = ('diagnosis', parsed.keyword_ids, self._age_bucket(self.diagnostic_engine, age))
+            cached = self._cache_get(cache_key)
+            if cached is not None:
+                return cached
+            result = self.diagnostic_engine.diagnose(
+                parsed, 30 if age is None else age, 'Unknown' if gender is None else gender
+            )
+            self.result_cache.put(cache_key, result)
+            return result
         except Exception as e:
             logger.error(f"Diagnosis error: {str(e)}")
             return self._get_fallback_diagnosis()
     
-    def get_predictions(self, symptoms: str, age: Optional[int] = None, priority: Optional[str] = None) -> Dict:
-        """Get AI-powered outcome predictions"""
+    def _get_diagnoses_batch(self, records: List[Dict]) -> List[Dict]:
         try:
-            input_data = {'symptoms': symptoms}
-            if age is not None:
-                input_data['age'] = str(age)
-            if priority is not None:
-                input_data['priority'] = str(priority)
-            return self.predictive_analytics.process(input_data)
+            engine = self.diagnostic_engine
+            return engine.diagnose_batch(
+                [engine.parse_symptoms(record['symptoms']) for record in records],
+                [30 if record.get('age') is None else int(record['age']) for record in records]
+            )
+        except Exception as e:
+            logger.error(f"Batch diagnosis error: {str(e)}")
+            return [self._get_fallback_diagnosis() for _ in records]
+    
+    def _get_predictions(self, symptoms, age: Optional[int] = None, priority: Optional[str] = None) -> Dict:
+        try:
+            parsed = self.predictive_analytics.parse_symptoms(symptoms)
+            age = int(age) if age is not None else None
+            
+            cache_key = ('predictions', parsed.keyword_ids,
+                         self._age_bucket(self.predictive_analytics, age), priority)
+            cached = self._cache_get(cache_key)
+            if cached is not None:
+                return cached
+            result = self.predictive_analytics.predict(
+                parsed, 30 if age is None else age, 'Medium' if priority is None else priority
+            )
+            self.result_cache.put(cache_key, result)
+            return result
         except Exception as e:
             logger.error(f"Prediction error: {str(e)}")
             return self._get_fallback_predictions()
     
+    def _get_predictions_batch(self, records: List[Dict]) -> List[Dict]:
+        return [self._get_predictions(record['symptoms'], record.get('age'), record.get('priority'))
+                for record in records]
+    
+    def _triage(self, symptoms, age: Optional[int] = None, gender: Optional[str] = None,
+                priority: Optional[str] = None) -> Dict:
+        parsed = self.diagnostic_engine.parse_symptoms(symptoms)
+        diagnosis = self._get_diagnosis(parsed, age, gender)
+        # An unknown priority is treated as absent rather than echoed back and scored as Medium
+        if priority in PRIORITY_LEVELS:
+            priority_source = 'provided'
+        else:
+            priority_source = 'derived'
+            priority = self.derive_priority(diagnosis.get('diagnosis', []))
+        return {
+            'diagnosis': diagnosis,
+            'predictions': self._get_predictions(parsed, age, priority),
+            'priority': priority,
+            'priority_source': priority_source
+        }
+    
+    @staticmethod
+    def derive_priority(diagnoses: List[Dict]) -> str:
+        """Use the most severe suggested diagnosis as the triage priority"""
+        severities = {d.get('severity') for d in diagnoses}
+        for level in ('High', 'Medium'):
+            if level in severities:
+                return level
+        return 'Low'
+    
     def get_service_health(self) -> Dict:
         """Get health status of all AI services"""
         return {
             'services': self.service_status,
             'diagnostic_version': self.diagnostic_engine.model_version,
             'predictive_version': self.predictive_analytics.model_version,
+            # Pool workers each keep their own cache, which this process cannot see
+            'result_cache': self.result_cache.stats() if self.execution_backend == 'inline' else {
+                'scope': 'per_pool_worker',
+                'max_size': self.result_cache.max_size
+            },
+            'execution': {
+                'backend': self.execution_backend,
+                'workers': self.process_workers if self.execution_backend == 'process' else 0,
+                'chunk_size': self.chunk_size
+            },
             'last_updated': datetime.now().isoformat()
         }
     
+    def _run(self, method: str, *args):
+        """Call a manager method inline or in a pool worker, per the execution backend"""
+        if self.execution_backend == 'process':
+            pool = self._ensure_pool()
+            try:
+                return pool.submit(_pool_worker_call, method, args).result()
+            except BrokenProcessPool as e:
+                self._discard_pool(pool, e)
+        return getattr(self, method)(*args)
+    
+    def _run_chunked(self, method: str, records: List[Dict]) -> List[Dict]:
+        """Call a batch method, spreading chunk_size records per task over the pool workers"""
+        if self.execution_backend == 'process' and records:
+            pool = self._ensure_pool()
+            try:
+                futures = [
+                    pool.submit(_pool_worker_call, method, (records[start:start + self.chunk_size],))
+                    for start in range(0, len(records), self.chunk_size)
+                ]
+                return [result for future in futures for result in future.result()]
+            except BrokenProcessPool as e:
+                self._discard_pool(pool, e)
+        return getattr(self, method)(records)
+    
+    def _ensure_pool(self) -> ProcessPoolExecutor:
+        """Start the pool on first use, and again in a forked child, with every worker's engines built"""
+        pid = os.getpid()
+        if self._pool_pid == pid and self._pool is not None:
+            return self._pool
+        with self._pool_lock:
+            if self._pool_pid != pid or self._pool is None:
+                # Workers are not forked from the (threaded) web worker, whose locks they could inherit held
+                pool = ProcessPoolExecutor(
+                    max_workers=self.process_workers, mp_context=pool_context(),
+                    initializer=_init_pool_worker, initargs=(self.result_cache.max_size,)
+                )
+                # Each task submitted while no worker is idle starts another one, so this brings them all up
+                wait([pool.submit(os.getpid) for _ in range(self.process_workers)])
+                self._pool, self._pool_pid = pool, pid
+        return self._pool
+    
+    def _discard_pool(self, pool: ProcessPoolExecutor, error: Exception):
+        """Drop a broken pool so the next call starts a new one; this call runs inline"""
+        logger.error(f"AI worker pool failed, running inline: {str(error)}")
+        with self._pool_lock:
+            if self._pool is pool:
+                self._pool, self._pool_pid = None, None
+        pool.shutdown(wait=False, cancel_futures=True)
+    
+    def _model_versions(self) -> Tuple[str, str]:
+        return (self.diagnostic_engine.model_version, self.predictive_analytics.model_version)
+    
+    def _cache_get(self, cache_key) -> Optional[Dict]:
+        """Look up a cached result, dropping the cache if a model version changed"""
+        versions = self._model_versions()
+        if versions != self._cached_versions:
+            self.result_cache.clear()
+            self._cached_versions = versions
+        return self.result_cache.get(cache_key)
+    
+    @staticmethod
+    def _age_bucket(engine: BaseAIService, age: Optional[int]) -> Optional[int]:
+        """Map an age onto the engine's threshold bucket; None means the engine default"""
+        if age is None:
+            return None
+        return bisect_left(engine.age_bucket_edges, age)
+    
     def _get_fallback_diagnosis(self) -> Dict:
         """Fallback diagnosis when AI service fails"""
         return {
@@ -438,7 +1100,8 @@ class AIServiceManager:
                 'Please conduct manual assessment',
                 'Consult with attending physician'
             ],
-            'confidence': 0.5
+            'confidence': 0.5,
+            'fallback': True
         }
     
     def _get_fallback_predictions(self) -> Dict:
@@ -450,5 +1113,30 @@ class AIServiceManager:
             'outcome_prediction': {'full_recovery': 0.8, 'partial_recovery': 0.15, 'chronic_condition': 0.05}
         }
 
-# Global AI service manager instance
-ai_manager = AIServiceManager()
+# Manager of a pool worker process, built once by the pool initializer
+_pool_worker_manager: Optional[AIServiceManager] = None
+
+def _init_pool_worker(cache_size: int):
+    global _pool_worker_manager
+    _pool_worker_manager = AIServiceManager(cache_size=cache_size)
+
+def _pool_worker_call(method: str, args: tuple):
+    return getattr(_pool_worker_manager, method)(*args)
+
+_ai_manager = None
+_ai_manager_lock = threading.Lock()
+
+def get_ai_manager() -> AIServiceManager:
+    """The process-wide AIServiceManager, built on first use rather than at import"""
+    global _ai_manager
+    if _ai_manager is None:
+        with _ai_manager_lock:
+            if _ai_manager is None:
+                _ai_manager = AIServiceManager()
+    return _ai_manager
+
+def __getattr__(name):
+    # Keeps `from ai_services import ai_manager` working without building the engines at import
+    if name == 'ai_manager':
+        return get_ai_manager()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
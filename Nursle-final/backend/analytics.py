@@ -0,0 +1,134 @@
+"""
+Triage Analytics Rollup for Nursle
+Aggregates raw TriageRecord rows into one AnalyticsData row per day
+"""
+
+import logging
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+
+from models import db, TriageRecord, AnalyticsData
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_COLUMNS = {
+    'high': 'high_priority',
+    'medium': 'medium_priority',
+    'low': 'low_priority'
+}
+
+_refresh_lock = threading.Lock()
+_last_refresh = 0.0
+
+def rollup_triage_analytics(since: Optional[date] = None) -> int:
+    """
+    Aggregate triage records into AnalyticsData with one GROUP BY over the new window
+    Args:
+        since: First day to (re)aggregate. Defaults to the day before the latest
+            rolled-up day. The latest day may have been partial when it was last
+            aggregated, and rows the buffered triage sink flushes after midnight
+            can still belong to the day before.
+    Returns:
+        int: Number of daily rows inserted or updated
+    """
+    if since is None:
+        latest = db.session.query(func.max(AnalyticsData.date)).scalar()
+        since = latest - timedelta(days=1) if latest is not None else None
+    if since is None:
+        first_record = db.session.query(func.min(TriageRecord.created_at)).scalar()
+        if first_record is None:
+            return 0
+        since = first_record.date()
+    
+    day = func.date(TriageRecord.created_at)
+    counts = db.session.query(day, TriageRecord.priority, func.count(TriageRecord.id)) \
+        .filter(TriageRecord.created_at >= datetime.combine(since, datetime.min.time())) \
+        .group_by(day, TriageRecord.priority) \
+        .all()
+    
+    daily: Dict[date, Dict[str, int]] = {}
+    for row_day, priority, count in counts:
+        # SQLite returns DATE() as a string, PostgreSQL as a date
+        if isinstance(row_day, str):
+            row_day = date.fromisoformat(row_day)
+        totals = daily.setdefault(row_day, {'total_patients': 0, 'high_priority': 0,
+                                            'medium_priority': 0, 'low_priority': 0})
+        totals['total_patients'] += count
+        column = PRIORITY_COLUMNS.get((priority or '').lower())
+        if column:
+            totals[column] += count
+    
+    if daily:
+        _upsert_daily_rows(since, daily)
+    db.session.commit()
+    return len(daily)
+
+def _upsert_daily_rows(since: date, daily: Dict[date, Dict[str, int]]) -> None:
+    """
+    Write the daily totals, one row per day
+    PostgreSQL and SQLite use INSERT ... ON CONFLICT (date) DO UPDATE, so workers
+    rolling up the same day at once cannot create duplicate rows.
+    """
+    dialects = {'postgresql': postgresql, 'sqlite': sqlite}
+    dialect = dialects.get(db.session.get_bind().dialect.name)
+    if dialect is None:
+        # Other databases: check, then insert; the unique index rejects a concurrent duplicate
+        existing = {row.date: row for row in AnalyticsData.query.filter(AnalyticsData.date >= since)}
+        for row_day, totals in daily.items():
+            row = existing.get(row_day)
+            if row is None:
+                row = AnalyticsData(date=row_day)
+                db.session.add(row)
+            for column, value in totals.items():
+                setattr(row, column, value)
+        return
+    
+    statement = dialect.insert(AnalyticsData).values([
+        {'date': row_day, **totals} for row_day, totals in daily.items()
+    ])
+    columns = next(iter(daily.values())).keys()
+    db.session.execute(statement.on_conflict_do_update(
+        index_elements=[AnalyticsData.date],
+        set_={column: statement.excluded[column] for column in columns}
+    ))
+
+def refresh_triage_rollup(min_interval: float) -> None:
+    """Roll up the open window at most once per min_interval seconds in this process"""
+    global _last_refresh
+    now = time.monotonic()
+    if now - _last_refresh < min_interval or not _refresh_lock.acquire(blocking=False):
+        return
+    try:
+        rollup_triage_analytics()
+        _last_refresh = now
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Triage analytics rollup failed: {str(e)}")
+    finally:
+        _refresh_lock.release()
+
+def get_daily_stats(days: int = 7) -> List[Dict]:
+    """Read the precomputed daily rows for the last `days` days, newest first"""
+    # Triage records and their daily buckets are in UTC
+    today = datetime.utcnow().date()
+    start = today - timedelta(days=days - 1)
+    rows = {row.date: row for row in AnalyticsData.query.filter(AnalyticsData.date >= start)}
+    
+    daily_stats = []
+    for i in range(days):
+        current_date = today - timedelta(days=i)
+        row = rows.get(current_date)
+        daily_stats.append({
+            'date': current_date.isoformat(),
+            'total_patients': row.total_patients if row else 0,
+            'high_priority': row.high_priority if row else 0,
+            'medium_priority': row.medium_priority if row else 0,
+            'low_priority': row.low_priority if row else 0,
+            'avg_wait_time': row.avg_wait_time if row and row.avg_wait_time is not None else 0.0
+        })
+    return daily_stats
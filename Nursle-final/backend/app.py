@@ -1,29 +1,69 @@
 
 import os
-import random
-from datetime import datetime, date, timedelta
+import json
+import logging
+from datetime import datetime, date
 from dotenv import load_dotenv
 
 load_dotenv()
-from flask import Flask, request, jsonify, session
+logging.basicConfig(level=logging.INFO)
+from flask import Flask, Response, abort, request, jsonify, session, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
-from flask_session import Session
-from models import db, Nurse, Patient, MedicalHistory
+from sqlalchemy import select
+from models import db, Nurse, Patient, MedicalHistory, TRIAGE_PRIORITIES
 from ai_integration import ai_integration
+from analytics import rollup_triage_analytics, refresh_triage_rollup, get_daily_stats
+from metrics import request_metrics
+from db_pool import pool_engine_options, pool_status
+from session_backends import session_backend
+from auth import NurseIdentity, current_nurse, identity_cache, login_required
+from passwords import PasswordHashBusy, password_hasher
+from patient_queries import (
+    PATIENT_FIELDS, QueryError, patient_page_statement, patient_page_response,
+    patient_statement, patient_response, medical_history_statement, medical_history_response
+)
 
 app = Flask(__name__)
-CORS(app, supports_credentials=True)
+CORS_OPTIONS = {'supports_credentials': True}
+CORS(app, **CORS_OPTIONS)
 
 # Config
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY')
 app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = pool_engine_options(
+    app.config['SQLALCHEMY_DATABASE_URI'],
+    pool_size=int(os.environ.get('DB_POOL_SIZE', 5)),
+    max_overflow=int(os.environ.get('DB_MAX_OVERFLOW', 10)),
+    pool_timeout=float(os.environ.get('DB_POOL_TIMEOUT', 30)),
+    pool_recycle=int(os.environ.get('DB_POOL_RECYCLE', 1800)),
+    pool_pre_ping=os.environ.get('DB_POOL_PRE_PING', 'true').lower() == 'true'
+)
 app.config['SESSION_TYPE'] = os.environ.get('SESSION_TYPE')
+app.config['SESSION_BACKEND'] = os.environ.get('SESSION_BACKEND')
+app.config['TRIAGE_WRITE_MODE'] = os.environ.get('TRIAGE_WRITE_MODE', 'immediate')
+app.config['ANALYTICS_ROLLUP_INTERVAL'] = float(os.environ.get('ANALYTICS_ROLLUP_INTERVAL', 60))
+app.config['AI_WARM_UP'] = os.environ.get('AI_WARM_UP', 'false').lower() == 'true'
+app.config['AI_EXECUTION_BACKEND'] = os.environ.get('AI_EXECUTION_BACKEND', 'inline')
+# Each web worker (WEB_CONCURRENCY of them) starts its own pool, so split the CPUs between them
+app.config['AI_PROCESS_WORKERS'] = int(os.environ.get(
+    'AI_PROCESS_WORKERS', max(1, (os.cpu_count() or 1) // int(os.environ.get('WEB_CONCURRENCY', 1)))
+))
+app.config['AI_PROCESS_CHUNK_SIZE'] = int(os.environ.get('AI_PROCESS_CHUNK_SIZE', 256))
+app.config['METRICS_ENABLED'] = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+app.config['PASSWORD_HASH_METHOD'] = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt')
+app.config['PASSWORD_HASH_COST'] = os.environ.get('PASSWORD_HASH_COST')
+app.config['PASSWORD_HASH_EXECUTOR'] = os.environ.get('PASSWORD_HASH_EXECUTOR', 'inline')
+app.config['PASSWORD_HASH_WORKERS'] = int(os.environ.get('PASSWORD_HASH_WORKERS', min(4, os.cpu_count() or 1)))
+app.config['PASSWORD_HASH_TIMEOUT'] = os.environ.get('PASSWORD_HASH_TIMEOUT')
 
 db.init_app(app)
-Session(app)
+session_backend.init_app(app)
+identity_cache.init_app(app)
+password_hasher.init_app(app)
 ai_integration.init_app(app)
+request_metrics.init_app(app)
 
 # Authentication Routes
 @app.route('/api/signup', methods=['POST'])
@@ -38,7 +78,10 @@ def signup():
         data.get('nurse_id', ''),
         ''  # password_hash will be set by set_password
     )
-    nurse.set_password(data.get('password', ''))
+    try:
+        nurse.set_password(data.get('password', ''))
+    except PasswordHashBusy:
+        return jsonify({'error': 'Server busy, please retry'}), 503
     db.session.add(nurse)
     db.session.commit()
     return jsonify({'message': 'Signup successful'}), 201
@@ -49,28 +92,28 @@ def login():
     email = data.get('email', '')
     password = data.get('password', '')
     nurse = Nurse.query.filter_by(email=email).first()
-    if nurse and nurse.check_password(password):
+    try:
+        verified = nurse is not None and nurse.check_password(password)
+        if verified and nurse.rehash_password_if_needed(password):
+            db.session.commit()
+    except PasswordHashBusy:
+        return jsonify({'error': 'Server busy, please retry'}), 503
+    if verified:
         session['nurse_id'] = nurse.id
+        identity_cache.put(NurseIdentity.from_model(nurse))
         return jsonify({'message': 'Login successful', 'first_name': nurse.full_name.split()[0]}), 200
     return jsonify({'error': 'Invalid credentials'}), 401
 
 @app.route('/api/dashboard', methods=['GET'])
+@login_required
 def dashboard():
-    nurse_id = session.get('nurse_id')
-    if not nurse_id:
-        return jsonify({'error': 'Unauthorized'}), 401
-    nurse = Nurse.query.get(nurse_id)
-    if not nurse:
-        return jsonify({'error': 'Nurse not found'}), 404
-    return jsonify({'first_name': nurse.full_name.split()[0], 'email': nurse.email})
+    nurse = current_nurse()
+    return jsonify({'first_name': nurse.first_name, 'email': nurse.email})
 
 # Patient Management Routes
 @app.route('/api/patients', methods=['POST'])
+@login_required
 def create_patient():
-    nurse_id = session.get('nurse_id')
-    if not nurse_id:
-        return jsonify({'error': 'Unauthorized'}), 401
-    
     data = request.json or {}
     patient = Patient(
         data.get('first_name', ''),
@@ -83,45 +126,28 @@ def create_patient():
     return jsonify({'patient_id': patient.id, 'message': 'Patient created successfully'}), 201
 
 @app.route('/api/patients', methods=['GET'])
+@login_required
 def get_patients():
-    nurse_id = session.get('nurse_id')
-    if not nurse_id:
-        return jsonify({'error': 'Unauthorized'}), 401
-    
-    patients = Patient.query.all()
-    return jsonify([{
-        'id': p.id,
-        'first_name': p.first_name,
-        'last_name': p.last_name,
-        'age': p.age,
-        'gender': p.gender,
-        'created_at': p.created_at.isoformat()
-    } for p in patients])
+    try:
+        statement, fields, limit = patient_page_statement(request.args)
+    except QueryError as e:
+        return jsonify({'error': str(e)}), 400
+    rows = db.session.execute(statement).all()
+    return jsonify(patient_page_response(rows, fields, limit))
 
 @app.route('/api/patients/<int:patient_id>', methods=['GET'])
+@login_required
 def get_patient(patient_id):
-    nurse_id = session.get('nurse_id')
-    if not nurse_id:
-        return jsonify({'error': 'Unauthorized'}), 401
-    
-    patient = Patient.query.get_or_404(patient_id)
-    return jsonify({
-        'id': patient.id,
-        'first_name': patient.first_name,
-        'last_name': patient.last_name,
-        'age': patient.age,
-        'gender': patient.gender,
-        'created_at': patient.created_at.isoformat()
-    })
+    row = db.session.execute(patient_statement(patient_id)).first()
+    if row is None:
+        abort(404)
+    return jsonify(patient_response(row))
 
 # Medical History Routes
 @app.route('/api/patients/<int:patient_id>/medical-history', methods=['POST'])
 @app.route('/api/patients/<int:patient_id>/medical-history', methods=['POST'])
+@login_required
 def add_medical_history(patient_id):
-    nurse_id = session.get('nurse_id')
-    if not nurse_id:
-        return jsonify({'error': 'Unauthorized'}), 401
-    
     data = request.json or {}
     # Ensure required fields are present and correct types
     condition = data.get('condition', '')
@@ -148,137 +174,271 @@ def add_medical_history(patient_id):
     return jsonify({'message': 'Medical history added successfully'}), 201
 
 @app.route('/api/patients/<int:patient_id>/medical-history', methods=['GET'])
+@login_required
 def get_medical_history(patient_id):
-    nurse_id = session.get('nurse_id')
-    if not nurse_id:
-        return jsonify({'error': 'Unauthorized'}), 401
+    rows = db.session.execute(medical_history_statement(patient_id)).all()
+    return jsonify(medical_history_response(rows))
+
+# Data Export Routes
+EXPORT_YIELD_PER = 1000
+MEDICAL_HISTORY_FIELDS = ['id', 'patient_id', 'condition', 'diagnosis_date', 'treatment', 'status', 'created_at']
+
+def _stream_ndjson(record_type, model, fields):
+    """Yield one JSON line per row, fetched from a server-side cursor in fixed-size chunks"""
+    columns = [getattr(model, f) for f in fields]
+    statement = select(*columns).order_by(model.id).execution_options(yield_per=EXPORT_YIELD_PER)
+    for row in db.session.execute(statement):
+        record = {'record_type': record_type}
+        for field, value in zip(fields, row):
+            record[field] = value.isoformat() if isinstance(value, (datetime, date)) else value
+        yield json.dumps(record) + '\n'
+
+@app.route('/api/export/patients.ndjson', methods=['GET'])
+@login_required
+def export_patients():
+    include_history = request.args.get('include_history', 'true').lower() != 'false'
+    
+    def generate():
+        yield from _stream_ndjson('patient', Patient, PATIENT_FIELDS)
+        if include_history:
+            yield from _stream_ndjson('medical_history', MedicalHistory, MEDICAL_HISTORY_FIELDS)
     
-    history = MedicalHistory.query.filter_by(patient_id=patient_id).order_by(getattr(MedicalHistory, 'diagnosis_date').desc()).all()
-    return jsonify([{
-        'id': h.id,
-        'condition': h.condition,
-        'diagnosis_date': h.diagnosis_date.isoformat(),
-        'treatment': h.treatment,
-        'status': h.status,
-        'created_at': h.created_at.isoformat()
-    } for h in history])
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
 
 # Symptom Checker AI Routes
-@app.route('/api/symptoms/check', methods=['POST'])
-def check_symptoms():
-    nurse_id = session.get('nurse_id')
-    if not nurse_id:
-        return jsonify({'error': 'Unauthorized'}), 401
-    
-    data = request.json or {}
+def _parse_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+def _existing_patient_ids(patient_ids):
+    """Return the subset of patient ids that exist, in one query"""
+    patient_ids = {i for i in patient_ids if i is not None}
+    if not patient_ids:
+        return set()
+    return {row.id for row in db.session.query(Patient.id).filter(Patient.id.in_(patient_ids))}
+
+def parse_triage_priority(value):
+    """Validate an optional triage priority; omitted or empty means derive it from the diagnosis"""
+    if value is None or value == '':
+        return None
+    if value not in TRIAGE_PRIORITIES:
+        raise QueryError(f"Priority must be one of {', '.join(TRIAGE_PRIORITIES)}")
+    return value
+
+def parse_symptom_check(data):
+    """Validate a symptom check body into process_symptom_check arguments"""
     symptoms = data.get('symptoms', '')
-    age = data.get('age')
-    gender = data.get('gender')
-    
-    if not symptoms or not symptoms.strip():
-        return jsonify({'error': 'Symptoms description is required'}), 400
+    if not isinstance(symptoms, str) or not symptoms.strip():
+        raise QueryError('Symptoms description is required')
+    priority = parse_triage_priority(data.get('priority'))
     
-    # Use AI integration for symptom analysis
     # Ensure age is int and gender is str
+    age = data.get('age')
+    gender = data.get('gender')
     try:
         age_val = int(age) if age is not None else 0
     except Exception:
         age_val = 0
     gender_val = str(gender) if gender is not None else ''
-    result = ai_integration.process_symptom_check(
-        symptoms=symptoms,
-        age=age_val,
-        gender=gender_val,
-        nurse_id=nurse_id
-    )
+    patient_id = _parse_id(data.get('patient_id')) if data.get('patient_id') is not None else None
+    return {
+        'symptoms': symptoms,
+        'age': age_val,
+        'gender': gender_val,
+        'patient_id': patient_id,
+        'priority': priority
+    }
+
+def symptom_check_payload(result):
+    if result.get('success'):
+        return result.get('data')
+    # Return fallback data with error indication
+    fallback = result.get('fallback_data', {})
+    return {
+        'diagnosis': fallback.get('guidance'),
+        'recommendations': fallback.get('manual_factors'),
+        'error': result.get('error'),
+        'ai_status': 'unavailable'
+    }
+
+@app.route('/api/symptoms/check', methods=['POST'])
+@login_required
+def check_symptoms():
+    data = request.json or {}
+    try:
+        check = parse_symptom_check(data)
+    except QueryError as e:
+        return jsonify({'error': str(e)}), 400
+    if data.get('patient_id') is not None and check['patient_id'] not in _existing_patient_ids([check['patient_id']]):
+        return jsonify({'error': 'Patient not found'}), 404
     
+    # Use AI integration for symptom analysis
+    result = ai_integration.process_symptom_check(nurse_id=current_nurse().id, **check)
+    return jsonify(symptom_check_payload(result)), 200
+
+def triage_payload(result):
     if result.get('success'):
-        return jsonify(result.get('data'))
-    else:
-        # Return fallback data with error indication
-        fallback = result.get('fallback_data', {})
-        return jsonify({
-            'diagnosis': fallback.get('guidance'),
-            'recommendations': fallback.get('manual_factors'),
-            'error': result.get('error'),
-            'ai_status': 'unavailable'
-        }), 200
+        return result.get('data')
+    fallback = result.get('fallback_data', {})
+    return {
+        'priority': None,
+        'diagnosis': fallback.get('guidance'),
+        'recommendations': fallback.get('manual_factors'),
+        'predictions': fallback.get('predictions'),
+        'error': result.get('error'),
+        'ai_status': 'unavailable'
+    }
 
-# Triage Analytics Routes
-@app.route('/api/analytics/triage', methods=['GET'])
-def get_triage_analytics():
-    nurse_id = session.get('nurse_id')
-    if not nurse_id:
-        return jsonify({'error': 'Unauthorized'}), 401
+@app.route('/api/triage', methods=['POST'])
+@login_required
+def triage():
+    data = request.json or {}
+    try:
+        check = parse_symptom_check(data)
+    except QueryError as e:
+        return jsonify({'error': str(e)}), 400
+    if data.get('patient_id') is not None and check['patient_id'] not in _existing_patient_ids([check['patient_id']]):
+        return jsonify({'error': 'Patient not found'}), 404
     
-    # Generate mock analytics data
-    today = date.today()
-    analytics = []
+    # Diagnosis and predictions from one symptom parse, logged once
+    result = ai_integration.process_triage(nurse_id=current_nurse().id, **check)
+    return jsonify(triage_payload(result)), 200
+
+@app.route('/api/symptoms/check/batch', methods=['POST'])
+@login_required
+def check_symptoms_batch():
+    data = request.json or {}
+    records = data.get('records')
+    if not isinstance(records, list) or not records:
+        return jsonify({'error': 'A non-empty list of records is required'}), 400
+    max_batch = app.config.get('AI_MAX_BATCH_SIZE', 1000)
+    if len(records) > max_batch:
+        return jsonify({'error': f'Batch size exceeds limit of {max_batch} records'}), 400
     
-    for i in range(7):
-        current_date = today - timedelta(days=i)
-        analytics.append({
-            'date': current_date.isoformat(),
-            'total_patients': random.randint(15, 45),
-            'high_priority': random.randint(2, 8),
-            'medium_priority': random.randint(5, 15),
-            'low_priority': random.randint(8, 22),
-            'avg_wait_time': round(random.uniform(15.0, 45.0), 1)
+    # Invalid records get an error slot so results stay aligned with the input
+    results = [None] * len(records)
+    known_patients = _existing_patient_ids(
+        _parse_id(record.get('patient_id')) for record in records if isinstance(record, dict)
+    )
+    valid_positions = []
+    valid_records = []
+    for position, record in enumerate(records):
+        symptoms = record.get('symptoms', '') if isinstance(record, dict) else ''
+        if not isinstance(symptoms, str) or not symptoms.strip():
+            results[position] = {'error': 'Symptoms description is required'}
+            continue
+        try:
+            age_val = int(record.get('age')) if record.get('age') is not None else 0
+        except Exception:
+            age_val = 0
+        gender = record.get('gender')
+        try:
+            priority = parse_triage_priority(record.get('priority'))
+        except QueryError as e:
+            results[position] = {'error': str(e)}
+            continue
+        patient_id = None
+        if record.get('patient_id') is not None:
+            patient_id = _parse_id(record.get('patient_id'))
+            if patient_id not in known_patients:
+                results[position] = {'error': 'Patient not found'}
+                continue
+        valid_positions.append(position)
+        valid_records.append({
+            'symptoms': symptoms,
+            'age': age_val,
+            'gender': str(gender) if gender is not None else '',
+            'patient_id': patient_id,
+            'priority': priority
         })
     
+    if valid_records:
+        result = ai_integration.process_symptom_check_batch(valid_records, nurse_id=current_nurse().id)
+        if result.get('success'):
+            for position, item in zip(valid_positions, result.get('data')):
+                results[position] = item
+        else:
+            fallback = result.get('fallback_data', {})
+            for position in valid_positions:
+                results[position] = {
+                    'diagnosis': fallback.get('guidance'),
+                    'recommendations': fallback.get('manual_factors'),
+                    'error': result.get('error'),
+                    'ai_status': 'unavailable'
+                }
+    
+    return jsonify({'results': results})
+
+# Triage Analytics Routes
+@app.route('/api/analytics/triage', methods=['GET'])
+@login_required
+def get_triage_analytics():
+    # Serve precomputed daily rows, rolling up any new triage records first
+    refresh_triage_rollup(app.config['ANALYTICS_ROLLUP_INTERVAL'])
+    analytics = get_daily_stats(7)
+    total_week = sum(a['total_patients'] for a in analytics)
+    
     return jsonify({
         'daily_stats': analytics,
         'summary': {
-            'total_patients_week': sum(a['total_patients'] for a in analytics),
+            'total_patients_week': total_week,
             'avg_wait_time_week': round(sum(a['avg_wait_time'] for a in analytics) / len(analytics), 1),
-            'high_priority_percentage': round((sum(a['high_priority'] for a in analytics) / sum(a['total_patients'] for a in analytics)) * 100, 1)
+            'high_priority_percentage': round((sum(a['high_priority'] for a in analytics) / total_week) * 100, 1) if total_week else 0.0
         }
     })
 
+@app.cli.command('rollup-analytics')
+def rollup_analytics_command():
+    """Aggregate new triage records into the daily analytics table"""
+    updated = rollup_triage_analytics()
+    print(f"✅ Rolled up {updated} day(s) of triage analytics")
+
 # Predictive Healthcare Analytics Routes
-@app.route('/api/analytics/predictive', methods=['POST'])
-def predict_outcome():
-    nurse_id = session.get('nurse_id')
-    if not nurse_id:
-        return jsonify({'error': 'Unauthorized'}), 401
-    
-    data = request.json or {}
+def parse_predictive(data):
+    """Validate a predictive analytics body into process_predictive_analytics arguments"""
     symptoms = data.get('symptoms', '')
-    age = data.get('age')
+    if not isinstance(symptoms, str) or not symptoms.strip():
+        raise QueryError('Symptoms description is required')
     priority = data.get('priority', 'Medium')
+    if not isinstance(priority, str):
+        raise QueryError('Priority must be a string')
     
-    if not symptoms or not symptoms.strip():
-        return jsonify({'error': 'Symptoms description is required'}), 400
-    
-    # Use AI integration for predictive analytics
     # Ensure age is int
+    age = data.get('age')
     try:
         age_val = int(age) if age is not None else 0
     except Exception:
         age_val = 0
-    result = ai_integration.process_predictive_analytics(
-        symptoms=symptoms,
-        age=age_val,
-        priority=priority,
-        nurse_id=nurse_id
-    )
-    
+    return {'symptoms': symptoms, 'age': age_val, 'priority': priority}
+
+def predictive_payload(result):
     if result.get('success'):
-        return jsonify(result.get('data'))
-    else:
-        fallback = result.get('fallback_data', {})
-        return jsonify({
-            **fallback,
-            'error': result.get('error'),
-            'ai_status': 'unavailable'
-        }), 200
+        return result.get('data')
+    fallback = result.get('fallback_data', {})
+    return {
+        **fallback,
+        'error': result.get('error'),
+        'ai_status': 'unavailable'
+    }
+
+@app.route('/api/analytics/predictive', methods=['POST'])
+@login_required
+def predict_outcome():
+    data = request.json or {}
+    try:
+        prediction = parse_predictive(data)
+    except QueryError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # Use AI integration for predictive analytics
+    result = ai_integration.process_predictive_analytics(nurse_id=current_nurse().id, **prediction)
+    return jsonify(predictive_payload(result)), 200
 
 @app.route('/api/analytics/trends', methods=['GET'])
+@login_required
 def get_health_trends():
-    nurse_id = session.get('nurse_id')
-    if not nurse_id:
-        return jsonify({'error': 'Unauthorized'}), 401
-    
     # Generate trend data
     trends = {
         'seasonal_patterns': [
@@ -307,23 +467,15 @@ if __name__ == '__main__':
     app.run(host='0.0.0.0', port=port, debug=True)
 # AI Service Health Routes
 @app.route('/api/ai/health', methods=['GET'])
+@login_required
 def ai_health():
-    nurse_id = session.get('nurse_id')
-    if not nurse_id:
-        return jsonify({'error': 'Unauthorized'}), 401
-    
     health_status = ai_integration.get_ai_health_status()
     return jsonify(health_status)
 
 @app.route('/api/ai/models/info', methods=['GET'])
+@login_required
 def ai_models_info():
-    nurse_id = session.get('nurse_id')
-    if not nurse_id:
-        return jsonify({'error': 'Unauthorized'}), 401
-    
-    ai_manager = getattr(app, 'ai_manager', None)
-    if not ai_manager:
-        return jsonify({'error': 'AI manager not initialized'}), 500
+    ai_manager = ai_integration.manager
     models_info = {
         'diagnostic_engine': {
             'version': ai_manager.diagnostic_engine.model_version,
@@ -345,7 +497,11 @@ def health():
         # Try a simple DB query to ensure DB is up
         from sqlalchemy import text
         db.session.execute(text('SELECT 1'))
-        return jsonify({'status': 'healthy'}), 200
+        payload = {'status': 'healthy'}
+        pool = pool_status(db.engine)
+        if pool is not None:
+            payload['pool'] = pool
+        return jsonify(payload), 200
     except Exception as e:
         return jsonify({'status': 'unhealthy', 'error': str(e)}), 500
 
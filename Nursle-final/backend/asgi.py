@@ -0,0 +1,329 @@
+"""
+ASGI Entry Point for Nursle
+Serves the patient, medical history and AI routes natively on the event loop
+with async database access, and everything else through the Flask app via
+asgiref's WSGI adapter. The URL surface and JSON responses are unchanged.
+
+Run with:
+    uvicorn asgi:application --host 0.0.0.0 --port 8000 --workers 4
+"""
+
+import asyncio
+import json
+import logging
+import re
+import time
+from datetime import datetime
+
+from asgiref.wsgi import WsgiToAsgi
+from flask.sessions import SecureCookieSessionInterface
+from flask_cors.core import get_cors_headers, get_cors_options
+from itsdangerous import BadSignature
+from sqlalchemy import select
+from sqlalchemy.engine import make_url
+from werkzeug.datastructures import Headers, MultiDict
+from werkzeug.exceptions import NotFound
+from werkzeug.http import parse_cookie
+from urllib.parse import parse_qsl
+
+from app import (
+    app, CORS_OPTIONS, parse_symptom_check, symptom_check_payload, parse_predictive, predictive_payload,
+    triage_payload
+)
+from ai_integration import ai_integration
+from auth import NurseIdentity, identity_cache
+from metrics import registry
+from models import Nurse, Patient, ServerSession
+from patient_queries import (
+    QueryError, patient_page_statement, patient_page_response, patient_statement, patient_response,
+    medical_history_statement, medical_history_response
+)
+from session_backends import SqlSessionInterface
+
+logger = logging.getLogger(__name__)
+
+ASYNC_DRIVERS = {
+    'postgresql': 'postgresql+asyncpg',
+    'sqlite': 'sqlite+aiosqlite'
+}
+ASYNC_ENGINE_OPTIONS = ('pool_size', 'max_overflow', 'pool_timeout', 'pool_recycle', 'pool_pre_ping')
+
+class NativeRequest:
+    """The parts of an ASGI HTTP request the native handlers need"""
+    
+    def __init__(self, scope, body: bytes, path_params: dict):
+        self.method = scope['method']
+        self.headers = Headers([(k.decode('latin-1'), v.decode('latin-1')) for k, v in scope['headers']])
+        self.args = MultiDict(parse_qsl(scope.get('query_string', b'').decode('latin-1'), keep_blank_values=True))
+        self.cookies = parse_cookie(self.headers.get('Cookie', ''))
+        self.body = body
+        self.path_params = path_params
+    
+    def json(self):
+        """Parsed JSON body, or None when Flask would reject the body"""
+        if self.headers.get('Content-Type', '').split(';')[0].strip() != 'application/json':
+            return None
+        try:
+            data = json.loads(self.body or b'null')
+        except ValueError:
+            return None
+        return data if isinstance(data, dict) else None
+
+class FallBack(Exception):
+    """Raised by a native handler to hand the request to the Flask app instead"""
+
+class AsgiApplication:
+    """Dispatch native async routes, falling back to the WSGI app for the rest"""
+    
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.wsgi = WsgiToAsgi(flask_app)
+        self.cors_options = get_cors_options(flask_app, CORS_OPTIONS)
+        self.engine = None
+        self.native_enabled = isinstance(
+            flask_app.session_interface, (SecureCookieSessionInterface, SqlSessionInterface)
+        )
+        self.routes = [
+            ('GET', re.compile(r'^/api/patients$'), '/api/patients', self.get_patients),
+            ('GET', re.compile(r'^/api/patients/(?P<patient_id>\d+)$'),
+             '/api/patients/<int:patient_id>', self.get_patient),
+            ('GET', re.compile(r'^/api/patients/(?P<patient_id>\d+)/medical-history$'),
+             '/api/patients/<int:patient_id>/medical-history', self.get_medical_history),
+            ('POST', re.compile(r'^/api/symptoms/check$'), '/api/symptoms/check', self.check_symptoms),
+            ('POST', re.compile(r'^/api/triage$'), '/api/triage', self.triage),
+            ('POST', re.compile(r'^/api/analytics/predictive$'), '/api/analytics/predictive', self.predict_outcome)
+        ]
+        if flask_app.config.get('METRICS_ENABLED'):
+            self.request_seconds = registry.histogram(
+                'nursle_http_request_duration_seconds', 'Request latency by endpoint'
+            )
+            self.requests_total = registry.counter(
+                'nursle_http_requests_total', 'Requests served by endpoint and status'
+            )
+        else:
+            self.request_seconds = self.requests_total = None
+    
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+            return
+        if scope['type'] == 'http' and self.native_enabled:
+            for method, pattern, endpoint, handler in self.routes:
+                match = pattern.match(scope['path'])
+                if match and scope['method'] == method:
+                    await self.dispatch(scope, receive, send, endpoint, handler, match.groupdict())
+                    return
+        await self.wsgi(scope, receive, send)
+    
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                if self.flask_app.config['AI_EXECUTION_BACKEND'] == 'process':
+                    await asyncio.get_running_loop().run_in_executor(
+                        None, lambda: ai_integration.warm_up(start_pool=True)
+                    )
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if self.engine is not None:
+                    await self.engine.dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+    
+    async def dispatch(self, scope, receive, send, endpoint, handler, path_params):
+        start = time.perf_counter()
+        body = await self._read_body(receive)
+        request = NativeRequest(scope, body, path_params)
+        try:
+            if self._get_engine() is None:
+                raise FallBack()
+            identity = await self.current_nurse(request)
+            if identity is None:
+                response = self.flask_app.json.response({'error': 'Unauthorized'})
+                response.status_code = 401
+            else:
+                response = await handler(request, identity)
+        except FallBack:
+            await self.wsgi(scope, self._replay(body), send)
+            return
+        
+        for name, value in get_cors_headers(self.cors_options, request.headers, request.method).items():
+            if name not in response.headers:
+                response.headers[name] = value
+        # The session cookie was read, as Flask marks it when saving the session
+        response.vary.add('Cookie')
+        await send({
+            'type': 'http.response.start',
+            'status': response.status_code,
+            'headers': [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in response.headers.items()]
+        })
+        await send({'type': 'http.response.body', 'body': response.get_data()})
+        
+        if self.request_seconds is not None:
+            self.request_seconds.observe(time.perf_counter() - start, method=request.method, endpoint=endpoint)
+            self.requests_total.inc(method=request.method, endpoint=endpoint, status=response.status_code)
+    
+    async def current_nurse(self, request: NativeRequest):
+        """Resolve the logged-in nurse the same way auth.current_nurse does"""
+        interface = self.flask_app.session_interface
+        value = request.cookies.get(interface.get_cookie_name(self.flask_app))
+        if not value:
+            return None
+        
+        if isinstance(interface, SqlSessionInterface):
+            table = ServerSession.__table__
+            now = datetime.utcnow()
+            async with self.engine.connect() as conn:
+                row = (await conn.execute(
+                    select(table.c.data, table.c.expires_at)
+                    .where(table.c.session_id == value, table.c.expires_at > now)
+                )).first()
+                try:
+                    data = interface.serializer.loads(row.data) if row is not None else {}
+                except ValueError:
+                    data = {}
+                # Slide the expiry as SqlSessionInterface.save_session does for WSGI routes
+                if data and interface.renewal_due(self.flask_app, row.expires_at, now):
+                    await conn.execute(
+                        table.update().where(table.c.session_id == value)
+                        .values(expires_at=now + self.flask_app.permanent_session_lifetime)
+                    )
+                    await conn.commit()
+        else:
+            serializer = interface.get_signing_serializer(self.flask_app)
+            if serializer is None:
+                raise FallBack()
+            try:
+                data = serializer.loads(value, max_age=int(self.flask_app.permanent_session_lifetime.total_seconds()))
+            except BadSignature:
+                data = {}
+        
+        nurse_id = data.get('nurse_id')
+        if not nurse_id:
+            return None
+        identity = identity_cache.get(nurse_id)
+        if identity is None:
+            async with self.engine.connect() as conn:
+                row = (await conn.execute(
+                    select(Nurse.id, Nurse.full_name, Nurse.email, Nurse.nurse_id).where(Nurse.id == nurse_id)
+                )).first()
+            if row is None:
+                return None
+            identity = NurseIdentity(row.id, row.full_name, row.email, row.nurse_id)
+            identity_cache.put(identity)
+        return identity
+    
+    # Native route handlers
+    async def get_patients(self, request, identity):
+        try:
+            statement, fields, limit = patient_page_statement(request.args)
+        except QueryError as e:
+            return self._json({'error': str(e)}, 400)
+        rows = await self._fetch_all(statement)
+        return self._json(patient_page_response(rows, fields, limit))
+    
+    async def get_patient(self, request, identity):
+        rows = await self._fetch_all(patient_statement(int(request.path_params['patient_id'])))
+        if not rows:
+            return NotFound().get_response()
+        return self._json(patient_response(rows[0]))
+    
+    async def get_medical_history(self, request, identity):
+        rows = await self._fetch_all(medical_history_statement(int(request.path_params['patient_id'])))
+        return self._json(medical_history_response(rows))
+    
+    async def check_symptoms(self, request, identity):
+        data = request.json()
+        if data is None:
+            raise FallBack()
+        try:
+            check = parse_symptom_check(data)
+        except QueryError as e:
+            return self._json({'error': str(e)}, 400)
+        if data.get('patient_id') is not None:
+            exists = check['patient_id'] is not None and await self._fetch_all(
+                select(Patient.id).where(Patient.id == check['patient_id'])
+            )
+            if not exists:
+                return self._json({'error': 'Patient not found'}, 404)
+        result = await ai_integration.process_symptom_check_async(nurse_id=identity.id, **check)
+        return self._json(symptom_check_payload(result))
+    
+    async def triage(self, request, identity):
+        data = request.json()
+        if data is None:
+            raise FallBack()
+        try:
+            check = parse_symptom_check(data)
+        except QueryError as e:
+            return self._json({'error': str(e)}, 400)
+        if data.get('patient_id') is not None:
+            exists = check['patient_id'] is not None and await self._fetch_all(
+                select(Patient.id).where(Patient.id == check['patient_id'])
+            )
+            if not exists:
+                return self._json({'error': 'Patient not found'}, 404)
+        result = await ai_integration.process_triage_async(nurse_id=identity.id, **check)
+        return self._json(triage_payload(result))
+    
+    async def predict_outcome(self, request, identity):
+        data = request.json()
+        if data is None:
+            raise FallBack()
+        try:
+            prediction = parse_predictive(data)
+        except QueryError as e:
+            return self._json({'error': str(e)}, 400)
+        result = await ai_integration.process_predictive_analytics_async(nurse_id=identity.id, **prediction)
+        return self._json(predictive_payload(result))
+    
+    # Helpers
+    def _get_engine(self):
+        """Create the async engine on first use; None disables the native routes"""
+        if self.engine is None and self.native_enabled:
+            try:
+                from sqlalchemy.ext.asyncio import create_async_engine
+                url = make_url(self.flask_app.config['SQLALCHEMY_DATABASE_URI'])
+                url = url.set(drivername=ASYNC_DRIVERS[url.get_backend_name()])
+                options = self.flask_app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+                self.engine = create_async_engine(
+                    url, **{k: v for k, v in options.items() if k in ASYNC_ENGINE_OPTIONS}
+                )
+            except Exception as e:
+                logger.warning(f"Async database unavailable, serving every route through WSGI: {str(e)}")
+                self.native_enabled = False
+        return self.engine
+    
+    async def _fetch_all(self, statement):
+        async with self.engine.connect() as conn:
+            return (await conn.execute(statement)).all()
+    
+    def _json(self, payload, status: int = 200):
+        response = self.flask_app.json.response(payload)
+        response.status_code = status
+        return response
+    
+    @staticmethod
+    async def _read_body(receive) -> bytes:
+        chunks = []
+        while True:
+            message = await receive()
+            chunks.append(message.get('body', b''))
+            if not message.get('more_body'):
+                return b''.join(chunks)
+    
+    @staticmethod
+    def _replay(body: bytes):
+        """A receive callable that hands an already-read body to the WSGI adapter"""
+        sent = False
+        
+        async def receive():
+            nonlocal sent
+            if sent:
+                return {'type': 'http.disconnect'}
+            sent = True
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+        
+        return receive
+
+application = AsgiApplication(app)
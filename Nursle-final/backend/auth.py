@@ -0,0 +1,148 @@
+"""
+Authentication for Nursle
+Resolves the logged-in nurse once per request, backed by a short-TTL
+in-process identity cache that is invalidated when a nurse row changes.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import wraps
+from typing import Dict, Optional
+
+from flask import g, jsonify, session
+from sqlalchemy import event
+from sqlalchemy.orm import Session as OrmSession, object_session
+
+from models import db, Nurse
+
+@dataclass(frozen=True)
+class NurseIdentity:
+    """Immutable snapshot of the fields routes need about the current nurse"""
+    id: int
+    full_name: str
+    email: str
+    nurse_id: str
+    
+    @property
+    def first_name(self) -> str:
+        return self.full_name.split()[0] if self.full_name.split() else ''
+    
+    @classmethod
+    def from_model(cls, nurse: Nurse) -> 'NurseIdentity':
+        return cls(nurse.id, nurse.full_name, nurse.email, nurse.nurse_id)
+
+class IdentityCache:
+    """Thread-safe TTL cache of NurseIdentity keyed by nurse id"""
+    
+    def __init__(self, ttl: float = 30.0, max_size: int = 1024, app=None):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: 'OrderedDict[int, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        app.config.setdefault('AUTH_IDENTITY_TTL', 30.0)
+        app.config.setdefault('AUTH_IDENTITY_CACHE_SIZE', 1024)
+        self.ttl = float(app.config['AUTH_IDENTITY_TTL'])
+        self.max_size = int(app.config['AUTH_IDENTITY_CACHE_SIZE'])
+        self.clear()
+        app.extensions['identity_cache'] = self
+    
+    def get(self, nurse_id: int) -> Optional[NurseIdentity]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(nurse_id)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(nurse_id)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[nurse_id]
+            self.misses += 1
+            return None
+    
+    def put(self, identity: NurseIdentity):
+        if self.ttl <= 0 or self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[identity.id] = (time.monotonic() + self.ttl, identity)
+            self._entries.move_to_end(identity.id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    
+    def invalidate(self, nurse_id: int):
+        with self._lock:
+            if self._entries.pop(nurse_id, None) is not None:
+                self.invalidations += 1
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> Dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+                'hit_rate': round(self.hits / total, 3) if total else 0.0
+            }
+
+identity_cache = IdentityCache()
+
+def load_identity(nurse_id: int) -> Optional[NurseIdentity]:
+    """Return the identity for a nurse id, from the cache when fresh"""
+    identity = identity_cache.get(nurse_id)
+    if identity is None:
+        nurse = db.session.get(Nurse, nurse_id)
+        if nurse is None:
+            return None
+        identity = NurseIdentity.from_model(nurse)
+        identity_cache.put(identity)
+    return identity
+
+def current_nurse() -> Optional[NurseIdentity]:
+    """Resolve the logged-in nurse at most once per request"""
+    if 'nurse' not in g:
+        nurse_id = session.get('nurse_id')
+        g.nurse = load_identity(nurse_id) if nurse_id else None
+    return g.nurse
+
+def login_required(view):
+    """Reject the request with 401 unless a nurse is logged in"""
+    @wraps(view)
+    def wrapped(*args, **kwargs):
+        if current_nurse() is None:
+            return jsonify({'error': 'Unauthorized'}), 401
+        return view(*args, **kwargs)
+    return wrapped
+
+# Invalidate on flush so this process stops serving the old row at once, and
+# again after commit in case another request re-cached it in between.
+@event.listens_for(Nurse, 'after_update')
+@event.listens_for(Nurse, 'after_delete')
+def _invalidate_changed_nurse(mapper, connection, target):
+    identity_cache.invalidate(target.id)
+    orm_session = object_session(target)
+    if orm_session is not None:
+        orm_session.info.setdefault('changed_nurse_ids', set()).add(target.id)
+
+@event.listens_for(OrmSession, 'after_commit')
+def _invalidate_committed_nurses(orm_session):
+    for nurse_id in orm_session.info.pop('changed_nurse_ids', ()):
+        identity_cache.invalidate(nurse_id)
+
+@event.listens_for(OrmSession, 'after_rollback')
+def _discard_changed_nurses(orm_session):
+    orm_session.info.pop('changed_nurse_ids', None)
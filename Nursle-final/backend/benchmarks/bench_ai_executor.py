@@ -0,0 +1,86 @@
+"""
+AI execution backend throughput benchmark
+Compares AIServiceManager running inline against the process pool backend:
+single triage calls from concurrent request threads, and diagnosis batches
+at several chunk sizes. Results are only meaningful on multi-core hosts;
+with one core the pool just adds pickling and IPC on top of the same work.
+
+Usage:
+    python benchmarks/bench_ai_executor.py
+    python benchmarks/bench_ai_executor.py --threads 16 --workers 8 --chunk-sizes 64 256 1024
+"""
+
+import argparse
+import itertools
+import os
+import sys
+import threading
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from corpora import CORPORA
+from ai_services import AIServiceManager
+
+def drive_calls(manager, corpus, threads, duration):
+    """Concurrent request threads calling triage(); returns calls per second"""
+    counts = [0] * threads
+    deadline = time.monotonic() + duration
+    
+    def loop(index):
+        texts = itertools.cycle(corpus[index::threads] or corpus)
+        ages = itertools.cycle([4, 17, 34, 52, 67, 80])
+        while time.monotonic() < deadline:
+            manager.triage(next(texts), next(ages))
+            counts[index] += 1
+    
+    workers = [threading.Thread(target=loop, args=(i,)) for i in range(threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return sum(counts) / (time.perf_counter() - started)
+
+def drive_batches(manager, records, repeat):
+    """Diagnosis batches back to back; returns records per second"""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        manager.get_diagnoses_batch(records)
+    return len(records) * repeat / (time.perf_counter() - started)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--corpus', default='long', choices=list(CORPORA))
+    parser.add_argument('--threads', type=int, default=8, help='Concurrent request threads')
+    parser.add_argument('--duration', type=float, default=5.0, help='Seconds per single-call run')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Pool worker processes')
+    parser.add_argument('--chunk-sizes', type=int, nargs='+', default=[64, 256, 1024])
+    parser.add_argument('--batch', type=int, default=20000, help='Records per diagnosis batch')
+    parser.add_argument('--repeat', type=int, default=3, help='Batches per chunk size')
+    args = parser.parse_args(argv)
+    
+    corpus = CORPORA[args.corpus](size=max(args.threads * 50, 200))
+    records = [{'symptoms': corpus[i % len(corpus)], 'age': i % 90} for i in range(args.batch)]
+    print(f"{os.cpu_count()} CPUs, {args.workers} pool workers, {args.threads} request threads, "
+          f"'{args.corpus}' corpus; result caches disabled")
+    
+    inline = AIServiceManager(cache_size=0)
+    pooled = AIServiceManager(cache_size=0, execution_backend='process', process_workers=args.workers)
+    try:
+        print(f"\n{'triage calls':<24}{'calls/s':>12}")
+        for label, manager in (('inline', inline), ('process', pooled)):
+            print(f"{label:<24}{drive_calls(manager, corpus, args.threads, args.duration):>12.1f}")
+        
+        print(f"\n{'diagnosis batch':<24}{'records/s':>12}")
+        print(f"{'inline':<24}{drive_batches(inline, records, args.repeat):>12.1f}")
+        for chunk_size in args.chunk_sizes:
+            pooled.chunk_size = chunk_size
+            print(f"{f'process, chunk {chunk_size}':<24}{drive_batches(pooled, records, args.repeat):>12.1f}")
+    finally:
+        pooled.shutdown()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+"""
+Sync (gunicorn) vs ASGI (uvicorn) serving benchmark
+Starts each server against the same seeded database, logs in once, then
+drives the patient, medical history and symptom check routes from many
+concurrent clients and prints throughput and latency percentiles.
+
+Requires httpx (pip install httpx) in addition to requirements.txt.
+
+Usage:
+    python benchmarks/bench_asgi.py --clients 500 --duration 20
+    python benchmarks/bench_asgi.py --database-url postgresql://... --workers 4
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+MODES = {
+    'sync': lambda port, workers: ['gunicorn', '-k', 'sync', '-w', str(workers), '-b', f'127.0.0.1:{port}',
+                                   '--log-level', 'warning', 'app:app'],
+    'asgi': lambda port, workers: ['uvicorn', 'asgi:application', '--host', '127.0.0.1', '--port', str(port),
+                                   '--workers', str(workers), '--log-level', 'warning', '--no-access-log']
+}
+
+def seed_database(env, patients):
+    """Create and seed the database once in a child process so both servers share it"""
+    script = (
+        "from app import app, db\n"
+        "from seed import seed_demo_accounts, generate_load_data\n"
+        "with app.app_context():\n"
+        "    db.create_all()\n"
+        "    seed_demo_accounts()\n"
+        f"    generate_load_data(nurses=10, patients={patients}, histories_per_patient=3, triage_per_patient=0)\n"
+    )
+    subprocess.run([sys.executable, '-c', script], cwd=BACKEND_DIR, env=env, check=True, stdout=subprocess.DEVNULL)
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def wait_for_server(port, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server on port {port} did not start")
+
+async def drive(base_url, clients, duration, patients):
+    """Run `clients` concurrent request loops for `duration` seconds"""
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+        login = await client.post('/api/login', json={'email': 'nurse@example.com', 'password': 'NURSE123'})
+        login.raise_for_status()
+        
+        latencies = []
+        errors = 0
+        deadline = time.monotonic() + duration
+        
+        async def loop(rng):
+            nonlocal errors
+            while time.monotonic() < deadline:
+                roll = rng.random()
+                start = time.perf_counter()
+                try:
+                    if roll < 0.4:
+                        response = await client.get('/api/patients', params={'limit': 50})
+                    elif roll < 0.8:
+                        response = await client.get(f'/api/patients/{rng.randint(1, patients)}/medical-history')
+                    else:
+                        response = await client.post('/api/symptoms/check', json={
+                            'symptoms': rng.choice(['fever and cough', 'chest pain, shortness of breath',
+                                                    'headache with dizziness', 'nausea and vomiting']),
+                            'age': rng.randint(1, 90)
+                        })
+                    if response.status_code != 200:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append((time.perf_counter() - start) * 1000)
+        
+        started = time.perf_counter()
+        await asyncio.gather(*(loop(random.Random(i)) for i in range(clients)))
+        elapsed = time.perf_counter() - started
+    
+    latencies.sort()
+    pick = lambda q: latencies[min(int(len(latencies) * q), len(latencies) - 1)] if latencies else 0.0
+    return {
+        'requests': len(latencies),
+        'rps': len(latencies) / elapsed,
+        'p50_ms': statistics.median(latencies) if latencies else 0.0,
+        'p95_ms': pick(0.95),
+        'p99_ms': pick(0.99),
+        'errors': errors
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--modes', nargs='+', default=list(MODES), choices=list(MODES))
+    parser.add_argument('--clients', type=int, default=500, help='Concurrent clients')
+    parser.add_argument('--duration', type=float, default=20.0, help='Seconds per mode')
+    parser.add_argument('--workers', type=int, default=min(4, os.cpu_count() or 1), help='Server worker processes')
+    parser.add_argument('--patients', type=int, default=5000)
+    parser.add_argument('--database-url', help='Defaults to a temporary SQLite file')
+    args = parser.parse_args(argv)
+    
+    if httpx is None:
+        parser.error('httpx is required: pip install httpx')
+    
+    with tempfile.TemporaryDirectory() as workdir:
+        env = dict(os.environ)
+        env['DATABASE_URL'] = args.database_url or f"sqlite:///{os.path.join(workdir, 'asgi.db')}"
+        env.setdefault('SECRET_KEY', 'benchmark')
+        env.setdefault('SESSION_BACKEND', 'cookie')
+        seed_database(env, args.patients)
+        
+        print(f"{'mode':<6}{'requests':>10}{'req/s':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'errors':>8}")
+        for mode in args.modes:
+            port = free_port()
+            server = subprocess.Popen(MODES[mode](port, args.workers), cwd=BACKEND_DIR, env=env)
+            try:
+                wait_for_server(port)
+                result = asyncio.run(drive(f'http://127.0.0.1:{port}', args.clients, args.duration, args.patients))
+            finally:
+                server.terminate()
+                server.wait(timeout=30)
+            print(f"{mode:<6}{result['requests']:>10}{result['rps']:>10.1f}{result['p50_ms']:>8.1f}ms"
+                  f"{result['p95_ms']:>8.1f}ms{result['p99_ms']:>8.1f}ms{result['errors']:>8}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+"""
+Query-plan benchmark for the hot-query indexes
+Seeds a database, runs each hot query without and then with the indexes
+from models.py, and prints the plan and median latency for both.
+
+Usage:
+    python benchmarks/bench_indexes.py --rows 1000000
+    python benchmarks/bench_indexes.py --database-url postgresql://... --rows 1000000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, text
+
+from models import db
+
+HOT_INDEXES = [
+    'ix_patient_created_at_id',
+    'ix_medical_history_patient_id_diagnosis_date',
+    'ix_triage_record_created_at',
+    'ix_triage_record_patient_id_created_at'
+]
+
+def hot_queries(rows: int, now: datetime):
+    """The statements behind the login, history, pagination and analytics paths"""
+    patient_id = rows // 2
+    week_ago = now - timedelta(days=7)
+    return [
+        ('nurse by email',
+         "SELECT * FROM nurse WHERE email = :email",
+         {'email': f'nurse{rows // 200}@example.com'}),
+        ('medical history for patient',
+         "SELECT * FROM medical_history WHERE patient_id = :patient_id ORDER BY diagnosis_date DESC",
+         {'patient_id': patient_id}),
+        ('patients keyset page',
+         "SELECT id, first_name, last_name FROM patient WHERE (created_at, id) > (:created_at, :id) "
+         "ORDER BY created_at, id LIMIT 50",
+         {'created_at': now - timedelta(days=30), 'id': patient_id}),
+        ('triage records last 7 days',
+         "SELECT priority, count(*) FROM triage_record WHERE created_at >= :since GROUP BY priority",
+         {'since': week_ago}),
+        ('triage records for patient',
+         "SELECT * FROM triage_record WHERE patient_id = :patient_id AND created_at >= :since",
+         {'patient_id': patient_id, 'since': week_ago})
+    ]
+
+def seed(engine, rows: int, seed_value: int, now: datetime):
+    """Insert `rows` patients, medical histories and triage records, plus rows/100 nurses"""
+    rng = random.Random(seed_value)
+    nurses = max(rows // 100, 1)
+    chunk = 50000
+    with engine.begin() as conn:
+        conn.execute(db.metadata.tables['nurse'].insert(), [{
+            'id': i, 'full_name': f'Nurse {i}', 'email': f'nurse{i}@example.com',
+            'nurse_id': f'N{i}', 'password_hash': 'x'
+        } for i in range(1, nurses + 1)])
+    for table, make_row in (
+        ('patient', lambda i: {
+            'id': i, 'first_name': f'First{i}', 'last_name': f'Last{i}', 'age': rng.randint(0, 95),
+            'gender': rng.choice(['F', 'M']), 'created_at': now - timedelta(minutes=rng.randint(0, 525600))
+        }),
+        ('medical_history', lambda i: {
+            'id': i, 'patient_id': rng.randint(1, rows), 'condition': 'Hypertension',
+            'diagnosis_date': now - timedelta(days=rng.randint(0, 3650)), 'treatment': '', 'status': 'Active',
+            'created_at': now
+        }),
+        ('triage_record', lambda i: {
+            'id': i, 'patient_id': rng.randint(1, rows), 'nurse_id': rng.randint(1, nurses),
+            'symptoms': 'cough', 'priority': rng.choice(['High', 'Medium', 'Low']),
+            'created_at': now - timedelta(minutes=rng.randint(0, 525600))
+        })
+    ):
+        for start in range(1, rows + 1, chunk):
+            batch = [make_row(i) for i in range(start, min(start + chunk, rows + 1))]
+            with engine.begin() as conn:
+                conn.execute(db.metadata.tables[table].insert(), batch)
+
+def explain(conn, dialect: str, sql: str, params: dict) -> str:
+    prefix = 'EXPLAIN QUERY PLAN ' if dialect == 'sqlite' else 'EXPLAIN '
+    rows = conn.execute(text(prefix + sql), params).fetchall()
+    if dialect == 'sqlite':
+        return '\n'.join(f'    {row[-1]}' for row in rows)
+    return '\n'.join(f'    {row[0]}' for row in rows)
+
+def measure(conn, sql: str, params: dict, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        conn.execute(text(sql), params).fetchall()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+def run_phase(engine, label: str, queries, repeat: int):
+    print(f"\n=== {label} ===")
+    with engine.connect() as conn:
+        for name, sql, params in queries:
+            print(f"- {name}: {measure(conn, sql, params, repeat):.3f} ms (median of {repeat})")
+            print(explain(conn, engine.dialect.name, sql, params))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-url', default='sqlite:///bench_indexes.db',
+                        help='Scratch database; its Nursle tables are dropped and recreated')
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    
+    engine = create_engine(args.database_url)
+    now = datetime(2026, 1, 1)
+    db.metadata.drop_all(engine)
+    db.metadata.create_all(engine)
+    with engine.begin() as conn:
+        for name in HOT_INDEXES:
+            conn.execute(text(f'DROP INDEX {name}'))
+    
+    print(f"Seeding {args.rows:,} rows per table into {engine.url.render_as_string(hide_password=True)} ...")
+    start = time.perf_counter()
+    seed(engine, args.rows, args.seed, now)
+    print(f"Seeded in {time.perf_counter() - start:.1f}s")
+    
+    queries = hot_queries(args.rows, now)
+    run_phase(engine, 'without hot-query indexes', queries, args.repeat)
+    
+    indexes = {index.name: index for table in db.metadata.sorted_tables for index in table.indexes}
+    for name in HOT_INDEXES:
+        indexes[name].create(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(text('ANALYZE'))
+    run_phase(engine, 'with hot-query indexes', queries, args.repeat)
+
+if __name__ == '__main__':
+    main()
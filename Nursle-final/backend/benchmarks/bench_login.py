@@ -0,0 +1,132 @@
+"""
+Login throughput benchmark for the password hashing policy
+Runs a login storm from concurrent clients against a seeded SQLite file for
+each hashing policy and executor, while a probe client measures the latency
+of a cheap route to show whether hashing starves other requests.
+
+Usage:
+    python benchmarks/bench_login.py
+    python benchmarks/bench_login.py --policies scrypt:16384 pbkdf2:sha256:600000 --executors inline thread
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PASSWORD = 'LOGINSTORM'
+
+def setup_app(workdir, nurses):
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'login.db')}"
+    os.environ.setdefault('SECRET_KEY', 'benchmark')
+    os.environ.setdefault('SESSION_BACKEND', 'cookie')
+    
+    from app import app
+    from models import db
+    
+    with app.app_context():
+        db.create_all()
+        db.session.execute(db.metadata.tables['nurse'].insert(), [{
+            'full_name': f'Nurse {i}', 'email': f'storm{i}@example.com',
+            'nurse_id': f'S{i}', 'password_hash': ''
+        } for i in range(nurses)])
+        db.session.commit()
+    return app
+
+def apply_policy(app, policy, executor, workers):
+    """Reconfigure the hasher and store every nurse's password under the policy"""
+    from models import db
+    from passwords import password_hasher
+    
+    app.config.update({
+        'PASSWORD_HASH_METHOD': policy,
+        'PASSWORD_HASH_COST': None,
+        'PASSWORD_HASH_EXECUTOR': executor,
+        'PASSWORD_HASH_WORKERS': workers,
+        'PASSWORD_HASH_TIMEOUT': None
+    })
+    password_hasher.init_app(app)
+    password_hash = password_hasher.hash(PASSWORD)
+    with app.app_context():
+        db.session.execute(db.metadata.tables['nurse'].update().values(password_hash=password_hash))
+        db.session.commit()
+    return password_hasher.method
+
+def run_storm(app, nurses, clients, logins):
+    """Fire `logins` logins from `clients` threads; probe /health until they finish"""
+    counter = iter(range(logins))
+    counter_lock = threading.Lock()
+    failures = []
+    probe_latencies = []
+    done = threading.Event()
+    
+    def login_client():
+        client = app.test_client()
+        while True:
+            with counter_lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            response = client.post('/api/login', json={'email': f'storm{i % nurses}@example.com', 'password': PASSWORD})
+            if response.status_code != 200:
+                failures.append(response.status_code)
+    
+    def probe_client():
+        client = app.test_client()
+        while not done.is_set():
+            start = time.perf_counter()
+            client.get('/health')
+            probe_latencies.append((time.perf_counter() - start) * 1000)
+            time.sleep(0.005)
+    
+    threads = [threading.Thread(target=login_client) for _ in range(clients)]
+    probe = threading.Thread(target=probe_client)
+    probe.start()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    done.set()
+    probe.join()
+    
+    probe_latencies.sort()
+    return {
+        'logins_per_s': logins / elapsed,
+        'failures': len(failures),
+        'probe_p50_ms': statistics.median(probe_latencies) if probe_latencies else 0.0,
+        'probe_p95_ms': probe_latencies[int(len(probe_latencies) * 0.95)] if probe_latencies else 0.0
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--policies', nargs='+', default=['scrypt:16384', 'scrypt:32768', 'pbkdf2:sha256:600000'],
+                        help='scrypt[:N] or pbkdf2:hash:iterations')
+    parser.add_argument('--executors', nargs='+', default=['inline', 'thread', 'process'],
+                        choices=['inline', 'thread', 'process'])
+    parser.add_argument('--workers', type=int, default=min(4, os.cpu_count() or 1), help='Hashing pool size')
+    parser.add_argument('--clients', type=int, default=16, help='Concurrent login clients')
+    parser.add_argument('--logins', type=int, default=200, help='Logins per run')
+    parser.add_argument('--nurses', type=int, default=50)
+    args = parser.parse_args(argv)
+    
+    with tempfile.TemporaryDirectory() as workdir:
+        app = setup_app(workdir, args.nurses)
+        print(f"{'policy':<26}{'executor':<10}{'logins/s':>10}{'probe p50':>12}{'probe p95':>12}{'fail':>6}")
+        for policy in args.policies:
+            for executor in args.executors:
+                method = apply_policy(app, policy, executor, args.workers)
+                result = run_storm(app, args.nurses, args.clients, args.logins)
+                print(f"{method:<26}{executor:<10}{result['logins_per_s']:>10.1f}"
+                      f"{result['probe_p50_ms']:>10.2f}ms{result['probe_p95_ms']:>10.2f}ms{result['failures']:>6}")
+        from passwords import password_hasher
+        password_hasher.shutdown()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""
+PredictiveAnalytics outcome table: equivalence check and benchmark
+Checks that the precomputed outcome table and the columnar process_batch
+return exactly what the outcome models compute for every condition type,
+priority and age (including the bracket edges and fractional ages), then
+times table lookups and batches against computing the models on each call.
+
+Usage:
+    python benchmarks/bench_predictive.py
+    python benchmarks/bench_predictive.py --check-only
+    python benchmarks/bench_predictive.py --cohort 100000
+"""
+
+import argparse
+import itertools
+import os
+import random
+import sys
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from harness import BenchCase, run_cases
+from corpora import CORPORA
+from ai_services import OUTCOME_COLUMNS, PRIORITY_LEVELS, PredictiveAnalytics
+
+AGES = list(range(-1, 121)) + [17.5, 17.99, 18.0, 60.5, 65.01, 70.5, 120.5, float('nan')]
+PRIORITIES = list(PRIORITY_LEVELS) + [None, '', 'Critical', 'high']
+
+def check_equivalence(engine: PredictiveAnalytics) -> int:
+    """Compare table lookups with the models; returns the number of mismatches"""
+    mismatches = 0
+    condition_types = list(engine.recovery_models) + ['general', 'unclassified']
+    for condition_type, age, priority in itertools.product(condition_types, AGES, PRIORITIES):
+        expected = engine._compute_outcomes(condition_type, age, priority)
+        if engine.lookup_outcomes(condition_type, age, priority) != expected:
+            mismatches += 1
+            print(f"Mismatch for {(condition_type, age, priority)}")
+    
+    # End to end, from symptom text through classification
+    for corpus in CORPORA.values():
+        for symptoms, age, priority in zip(corpus(), itertools.cycle(AGES), itertools.cycle(PRIORITIES)):
+            result = engine.predict(engine.parse_symptoms(symptoms), age, priority)
+            condition_type = engine._classify_condition_type(symptoms)
+            expected = dict(zip(('recovery_time', 'complications_risk', 'resource_needs', 'outcome_prediction'),
+                                engine._compute_outcomes(condition_type, age, priority)))
+            if {k: result[k] for k in expected} != expected or result['condition_type'] != condition_type:
+                mismatches += 1
+                print(f"Mismatch for {(symptoms, age, priority)}")
+    
+    # Columnar batch over every combination at once
+    rows = list(itertools.product(range(len(engine.condition_types)), AGES, PRIORITIES))
+    columns = engine.process_batch([r[0] for r in rows], [r[1] for r in rows],
+                                   np.array([r[2] for r in rows], dtype=object))
+    for i, (code, age, priority) in enumerate(rows):
+        expected = engine._compute_outcomes(engine.condition_types[code], age, priority)
+        for column, fragment, key in OUTCOME_COLUMNS:
+            if columns[column][i].item() != expected[fragment][key]:
+                mismatches += 1
+                print(f"Batch mismatch in {column} for {(engine.condition_types[code], age, priority)}")
+    return mismatches
+
+def cohort(engine: PredictiveAnalytics, size: int, seed: int = 4):
+    """Random ward or historical cohort as columnar inputs"""
+    rng = random.Random(seed)
+    return (
+        np.array([rng.randrange(len(engine.condition_types)) for _ in range(size)]),
+        np.array([rng.randint(0, 100) for _ in range(size)], dtype=float),
+        np.array([rng.choice(PRIORITY_LEVELS) for _ in range(size)])
+    )
+
+def bench_cases(engine: PredictiveAnalytics, cohort_size: int):
+    inputs = itertools.cycle(list(itertools.product(
+        list(engine.recovery_models) + ['general'], [4, 17, 34, 63, 67, 80], PRIORITY_LEVELS
+    )))
+    parsed = itertools.cycle([engine.parse_symptoms(s) for s in CORPORA['short']()])
+    ages = itertools.cycle([4, 17, 34, 63, 67, 80])
+    
+    def computed_predict():
+        # What predict() did before the table: classify, then run every model
+        p = next(parsed)
+        return engine._compute_outcomes(engine._classify_condition_type(p), next(ages), 'Medium')
+    
+    codes, cohort_ages, priorities = cohort(engine, cohort_size)
+    labels = [engine.condition_types[c] for c in codes]
+    
+    def scalar_cohort():
+        return [engine.lookup_outcomes(c, a, p) for c, a, p in zip(labels, cohort_ages.tolist(), priorities.tolist())]
+    
+    return [
+        BenchCase('outcomes.computed', lambda: engine._compute_outcomes(*next(inputs)), number=1000),
+        BenchCase('outcomes.table', lambda: engine.lookup_outcomes(*next(inputs)), number=1000),
+        BenchCase('predict.computed[short]', computed_predict, number=1000),
+        BenchCase('predict.table[short]', lambda: engine.predict(next(parsed), next(ages), 'Medium'), number=1000),
+        BenchCase(f'cohort.table_lookups[{cohort_size}]', scalar_cohort, number=1),
+        BenchCase(f'cohort.process_batch[{cohort_size}]',
+                  lambda: engine.process_batch(codes, cohort_ages, priorities), number=1)
+    ]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--check-only', action='store_true', help='Skip the timings')
+    parser.add_argument('--repeat', type=int, default=7)
+    parser.add_argument('--cohort', type=int, default=10000, help='Patients per columnar batch')
+    args = parser.parse_args(argv)
+    
+    engine = PredictiveAnalytics()
+    mismatches = check_equivalence(engine)
+    if mismatches:
+        print(f"ℹ️ {mismatches} outcome table mismatches")
+        return 1
+    print(f"✅ Outcome table matches the models ({len(engine.outcome_table)} entries)")
+    
+    if not args.check_only:
+        run_cases(bench_cases(engine, args.cohort), repeat=args.repeat)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
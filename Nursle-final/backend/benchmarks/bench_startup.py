@@ -0,0 +1,91 @@
+"""
+Cold start benchmark for the backend process
+Times fresh interpreters importing the app (what every worker, CLI script and
+autoscaled container pays), importing it with AI_WARM_UP=true, and serving the
+first symptom check, then checks the plain import against a time budget.
+
+Usage:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --runs 20 --budget-ms 800
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Each scenario runs in its own interpreter and prints its timings as JSON
+SCENARIOS = {
+    'import': (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        "import app\n"
+        "elapsed = time.perf_counter() - start\n"
+        "print(json.dumps({'ms': elapsed * 1000, 'numpy': 'numpy' in sys.modules}))\n"
+    ),
+    'import+warm_up': (
+        "import os, sys, time\n"
+        "os.environ['AI_WARM_UP'] = 'true'\n"
+        "start = time.perf_counter()\n"
+        "import app\n"
+        "elapsed = time.perf_counter() - start\n"
+        "print(json.dumps({'ms': elapsed * 1000, 'numpy': 'numpy' in sys.modules}))\n"
+    ),
+    'first_ai_request': (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        "import app\n"
+        "with app.app.test_request_context():\n"
+        "    app.ai_integration.process_symptom_check(symptoms='fever and cough', age=40)\n"
+        "elapsed = time.perf_counter() - start\n"
+        "print(json.dumps({'ms': elapsed * 1000, 'numpy': 'numpy' in sys.modules}))\n"
+    )
+}
+
+def run_scenario(script, env):
+    output = subprocess.run([sys.executable, '-c', 'import json\n' + script], cwd=BACKEND_DIR, env=env,
+                            check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=10, help='Fresh interpreters per scenario')
+    parser.add_argument('--scenarios', nargs='+', default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument('--budget-ms', type=float, default=1000.0,
+                        help='Maximum median time to import the app')
+    args = parser.parse_args(argv)
+    
+    with tempfile.TemporaryDirectory() as workdir:
+        env = dict(os.environ)
+        env['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'startup.db')}"
+        env.setdefault('SECRET_KEY', 'benchmark')
+        env.setdefault('SESSION_BACKEND', 'cookie')
+        env.pop('AI_WARM_UP', None)
+        
+        # One untimed run so the first scenario does not pay for cold .pyc compilation
+        run_scenario(SCENARIOS['import'], env)
+        
+        print(f"{'scenario':<20}{'median':>10}{'min':>10}{'max':>10}  numpy loaded")
+        medians = {}
+        for name in args.scenarios:
+            results = [run_scenario(SCENARIOS[name], env) for _ in range(args.runs)]
+            timings = [r['ms'] for r in results]
+            medians[name] = statistics.median(timings)
+            print(f"{name:<20}{medians[name]:>8.1f}ms{min(timings):>8.1f}ms{max(timings):>8.1f}ms"
+                  f"  {'yes' if results[0]['numpy'] else 'no'}")
+    
+    if 'import' not in medians:
+        return 0
+    if medians['import'] <= args.budget_ms:
+        print(f"✅ App import takes {medians['import']:.0f}ms, within the {args.budget_ms:.0f}ms budget")
+        return 0
+    print(f"ℹ️ App import takes {medians['import']:.0f}ms, over the {args.budget_ms:.0f}ms budget")
+    return 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,51 @@
+"""
+Deterministic symptom corpora for benchmarks
+"""
+
+import random
+from typing import List
+
+from ai_services import SYMPTOM_KEYWORDS, CONDITION_TYPE_KEYWORDS
+
+FILLER = ['patient', 'reports', 'since', 'yesterday', 'evening', 'worse', 'at', 'night', 'mild',
+          'severe', 'intermittent', 'no', 'known', 'allergies', 'took', 'paracetamol', 'with',
+          'little', 'relief', 'family', 'history', 'of', 'hypertension', 'and', 'the', 'has']
+
+def _keywords() -> List[str]:
+    words = [k for keywords in SYMPTOM_KEYWORDS.values() for k in keywords]
+    words += [k for _, keywords in CONDITION_TYPE_KEYWORDS for k in keywords]
+    return sorted(set(words))
+
+def short_corpus(size: int = 200, seed: int = 1) -> List[str]:
+    """One or two keywords, like a triage-desk quick entry"""
+    rng = random.Random(seed)
+    keywords = _keywords()
+    return [', '.join(rng.sample(keywords, rng.randint(1, 2))) for _ in range(size)]
+
+def long_corpus(size: int = 200, seed: int = 2, words: int = 120) -> List[str]:
+    """Free-text nursing notes with a few keywords buried in filler"""
+    rng = random.Random(seed)
+    keywords = _keywords()
+    corpus = []
+    for _ in range(size):
+        text = [rng.choice(FILLER) for _ in range(words)]
+        for keyword in rng.sample(keywords, 3):
+            text.insert(rng.randrange(len(text)), keyword)
+        corpus.append(' '.join(text).capitalize())
+    return corpus
+
+def many_keyword_corpus(size: int = 200, seed: int = 3) -> List[str]:
+    """Most of the vocabulary at once, the worst case for keyword matching"""
+    rng = random.Random(seed)
+    keywords = _keywords()
+    corpus = []
+    for _ in range(size):
+        chosen = rng.sample(keywords, len(keywords) * 3 // 4)
+        corpus.append(', '.join(chosen))
+    return corpus
+
+CORPORA = {
+    'short': short_corpus,
+    'long': long_corpus,
+    'many_keywords': many_keyword_corpus
+}
@@ -0,0 +1,92 @@
+"""
+Minimal benchmark harness with JSON baselines
+Each case is timed over several repeats; results can be saved as a baseline
+and later runs fail when a case's median slows past a regression threshold.
+"""
+
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines')
+
+@dataclass
+class BenchCase:
+    """A named callable; `number` calls are timed together per repeat"""
+    name: str
+    func: Callable[[], object]
+    number: int = 100
+
+def measure(case: BenchCase, repeat: int = 7, warmup: int = 1) -> Dict:
+    """Time a case and return per-call statistics in microseconds"""
+    for _ in range(warmup):
+        for _ in range(case.number):
+            case.func()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(case.number):
+            case.func()
+        timings.append((time.perf_counter() - start) / case.number * 1e6)
+    timings.sort()
+    median = statistics.median(timings)
+    return {
+        'median_us': round(median, 3),
+        'min_us': round(timings[0], 3),
+        'max_us': round(timings[-1], 3),
+        'ops_per_sec': round(1e6 / median, 1) if median else 0.0,
+        'number': case.number,
+        'repeat': repeat
+    }
+
+def run_cases(cases: List[BenchCase], repeat: int = 7) -> Dict[str, Dict]:
+    results = {}
+    for case in cases:
+        results[case.name] = measure(case, repeat=repeat)
+        stats = results[case.name]
+        print(f"{case.name:<48} {stats['median_us']:>12.1f} us  {stats['ops_per_sec']:>12.1f} ops/s")
+    return results
+
+def baseline_path(suite: str) -> str:
+    return os.path.join(BASELINE_DIR, f'{suite}.json')
+
+def save_baseline(path: str, suite: str, results: Dict[str, Dict]):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump({
+            'suite': suite,
+            'created_at': datetime.now().isoformat(),
+            'machine': {
+                'python': sys.version.split()[0],
+                'platform': platform.platform(),
+                'cpu_count': os.cpu_count()
+            },
+            'results': results
+        }, f, indent=2, sort_keys=True)
+    print(f"Saved baseline to {path}")
+
+def load_baseline(path: str) -> Optional[Dict]:
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def compare(results: Dict[str, Dict], baseline: Dict, threshold: float) -> List[str]:
+    """Return a message for every case whose median regressed by more than threshold"""
+    regressions = []
+    for name, stats in results.items():
+        previous = baseline.get('results', {}).get(name)
+        if not previous or not previous.get('median_us'):
+            continue
+        change = stats['median_us'] / previous['median_us'] - 1.0
+        marker = 'REGRESSION' if change > threshold else 'ok'
+        print(f"{name:<48} {previous['median_us']:>10.1f} -> {stats['median_us']:>10.1f} us  {change:+7.1%}  {marker}")
+        if change > threshold:
+            regressions.append(f"{name}: {change:+.1%} (threshold {threshold:.0%})")
+    return regressions
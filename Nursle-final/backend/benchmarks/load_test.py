@@ -0,0 +1,87 @@
+"""
+Load test for the gunicorn worker/thread defaults
+Runs gunicorn with gunicorn.conf.py as shipped and with alternative
+GUNICORN_WORKERS/GUNICORN_THREADS settings against the same seeded
+database, then checks that the defaults are within a tolerance of the best
+configuration measured on this machine.
+
+Requires httpx (pip install httpx) in addition to requirements.txt.
+
+Usage:
+    python benchmarks/load_test.py --clients 200 --duration 20
+    python benchmarks/load_test.py --grid 2x1 4x1 2x4 4x4 --tolerance 0.15
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+
+from bench_asgi import BACKEND_DIR, drive, free_port, httpx, seed_database, wait_for_server
+
+def default_grid():
+    """Classic sync sizing and thread-heavy variants around the shipped defaults"""
+    cpus = multiprocessing.cpu_count()
+    return [(cpus + 1, 1), (cpus * 2 + 1, 1), (cpus, 8), (cpus * 2 + 1, 8)]
+
+def run_config(env, clients, duration, patients, workers=None, threads=None):
+    env = dict(env)
+    port = free_port()
+    env['PORT'] = str(port)
+    env['GUNICORN_BIND'] = f'127.0.0.1:{port}'
+    env['GUNICORN_LOG_LEVEL'] = 'warning'
+    if workers is not None:
+        env['GUNICORN_WORKERS'] = str(workers)
+    if threads is not None:
+        env['GUNICORN_THREADS'] = str(threads)
+    server = subprocess.Popen(['gunicorn', '-c', 'gunicorn.conf.py'], cwd=BACKEND_DIR, env=env)
+    try:
+        wait_for_server(port)
+        return asyncio.run(drive(f'http://127.0.0.1:{port}', clients, duration, patients))
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--clients', type=int, default=200, help='Concurrent clients')
+    parser.add_argument('--duration', type=float, default=20.0, help='Seconds per configuration')
+    parser.add_argument('--patients', type=int, default=5000)
+    parser.add_argument('--grid', nargs='*', help='Alternative WORKERSxTHREADS settings, e.g. 4x1 2x8')
+    parser.add_argument('--tolerance', type=float, default=0.10,
+                        help='Allowed throughput shortfall of the defaults versus the best configuration')
+    parser.add_argument('--database-url', help='Defaults to a temporary SQLite file')
+    args = parser.parse_args(argv)
+    
+    if httpx is None:
+        parser.error('httpx is required: pip install httpx')
+    grid = [tuple(int(n) for n in spec.split('x')) for spec in args.grid] if args.grid else default_grid()
+    
+    with tempfile.TemporaryDirectory() as workdir:
+        env = dict(os.environ)
+        env['DATABASE_URL'] = args.database_url or f"sqlite:///{os.path.join(workdir, 'load.db')}"
+        env.setdefault('SECRET_KEY', 'benchmark')
+        env.setdefault('SESSION_BACKEND', 'cookie')
+        seed_database(env, args.patients)
+        
+        print(f"{'config':<14}{'req/s':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'errors':>8}")
+        results = {}
+        for label, workers, threads in [('defaults', None, None)] + [(f'{w}x{t}', w, t) for w, t in grid]:
+            result = run_config(env, args.clients, args.duration, args.patients, workers, threads)
+            results[label] = result
+            print(f"{label:<14}{result['rps']:>10.1f}{result['p50_ms']:>8.1f}ms"
+                  f"{result['p95_ms']:>8.1f}ms{result['p99_ms']:>8.1f}ms{result['errors']:>8}")
+    
+    best_label = max(results, key=lambda label: results[label]['rps'])
+    shortfall = 1 - results['defaults']['rps'] / results[best_label]['rps']
+    if shortfall <= args.tolerance and not results['defaults']['errors']:
+        print(f"✅ Defaults are within {shortfall:.0%} of the best configuration ({best_label})")
+        return 0
+    print(f"ℹ️ Defaults are {shortfall:.0%} behind {best_label}; consider setting GUNICORN_WORKERS/GUNICORN_THREADS")
+    return 1
+
+if __name__ == '__main__':
+    sys.exit(main())
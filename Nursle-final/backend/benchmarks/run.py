@@ -0,0 +1,139 @@
+"""
+Benchmark suite for the AI engines and API routes
+Usage:
+    python benchmarks/run.py                      # run all suites, compare with saved baselines
+    python benchmarks/run.py --suite ai --save    # record a new baseline for the AI suite
+    python benchmarks/run.py --threshold 0.10     # fail on >10% median regressions
+
+Baselines are JSON files in benchmarks/baselines/. Record them on the machine
+class you deploy to; numbers are not comparable across hardware.
+"""
+
+import argparse
+import itertools
+import os
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import logging
+
+from harness import BenchCase, run_cases, baseline_path, save_baseline, load_baseline, compare
+from corpora import CORPORA
+
+def cycle(items):
+    """Return a zero-argument callable yielding items round-robin"""
+    iterator = itertools.cycle(items)
+    return lambda: next(iterator)
+
+def ai_cases():
+    from ai_services import DiagnosticEngine, PredictiveAnalytics, AIServiceManager
+    
+    diagnostic = DiagnosticEngine()
+    predictive = PredictiveAnalytics()
+    cold_manager = AIServiceManager(cache_size=0)
+    warm_manager = AIServiceManager(cache_size=4096)
+    
+    cases = []
+    for corpus_name, build in CORPORA.items():
+        corpus = build()
+        next_symptoms = cycle(corpus)
+        next_age = cycle([4, 17, 34, 52, 67, 80])
+        # A small working set of repeated inputs, as at a busy triage desk
+        next_repeated = cycle(corpus[:20])
+        cases += [
+            BenchCase(f'diagnostic.process[{corpus_name}]',
+                      lambda n=next_symptoms, a=next_age: diagnostic.process({'symptoms': n(), 'age': a()})),
+            BenchCase(f'predictive.process[{corpus_name}]',
+                      lambda n=next_symptoms, a=next_age: predictive.process({'symptoms': n(), 'age': a(), 'priority': 'Medium'})),
+            BenchCase(f'manager.get_diagnosis.cold[{corpus_name}]',
+                      lambda n=next_symptoms, a=next_age: cold_manager.get_diagnosis(n(), a(), 'Female')),
+            BenchCase(f'manager.get_diagnosis.warm[{corpus_name}]',
+                      lambda n=next_repeated: warm_manager.get_diagnosis(n(), 34, 'Female')),
+            BenchCase(f'manager.get_predictions.cold[{corpus_name}]',
+                      lambda n=next_symptoms, a=next_age: cold_manager.get_predictions(n(), a(), 'High')),
+        ]
+        batch = [{'symptoms': s, 'age': 30 + i % 50, 'gender': 'Male'} for i, s in enumerate(corpus)]
+        cases.append(BenchCase(f'manager.get_diagnoses_batch[{corpus_name},{len(batch)}]',
+                               lambda b=batch: cold_manager.get_diagnoses_batch(b), number=5))
+    return cases
+
+def route_cases(workdir):
+    """Exercise the Flask routes through the test client against a seeded SQLite file"""
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ.setdefault('SECRET_KEY', 'benchmark')
+    os.environ.setdefault('SESSION_BACKEND', 'cookie')
+    
+    from app import app
+    from models import db
+    from seed import seed_demo_accounts, generate_load_data
+    
+    with app.app_context():
+        db.create_all()
+        seed_demo_accounts()
+        generate_load_data(nurses=10, patients=5000, histories_per_patient=2, triage_per_patient=1)
+    
+    client = app.test_client()
+    client.post('/api/login', json={'email': 'nurse@example.com', 'password': 'NURSE123'})
+    next_symptoms = cycle(CORPORA['short']() + CORPORA['long'](50))
+    next_age = cycle([4, 17, 34, 52, 67, 80])
+    
+    def post(url, payload):
+        response = client.post(url, json=payload)
+        assert response.status_code == 200, response.status_code
+    
+    def get(url):
+        response = client.get(url)
+        assert response.status_code == 200, response.status_code
+    
+    return [
+        BenchCase('POST /api/symptoms/check',
+                  lambda: post('/api/symptoms/check', {'symptoms': next_symptoms(), 'age': next_age()})),
+        BenchCase('POST /api/analytics/predictive',
+                  lambda: post('/api/analytics/predictive', {'symptoms': next_symptoms(), 'age': next_age()})),
+        BenchCase('GET /api/patients?limit=50', lambda: get('/api/patients?limit=50')),
+        BenchCase('GET /api/patients?limit=500&fields=id,first_name',
+                  lambda: get('/api/patients?limit=500&fields=id,first_name'), number=20),
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--suite', choices=['ai', 'routes', 'all'], default='all')
+    parser.add_argument('--save', action='store_true', help='Write results as the new baseline')
+    parser.add_argument('--threshold', type=float, default=0.20,
+                        help='Allowed median slowdown versus the baseline (0.20 = 20%%)')
+    parser.add_argument('--repeat', type=int, default=7)
+    args = parser.parse_args()
+    
+    # Request logging would dominate the route timings
+    logging.disable(logging.INFO)
+    
+    suites = ['ai', 'routes'] if args.suite == 'all' else [args.suite]
+    regressions = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for suite in suites:
+            print(f"\n=== {suite} ===")
+            cases = ai_cases() if suite == 'ai' else route_cases(workdir)
+            results = run_cases(cases, repeat=args.repeat)
+            path = baseline_path(suite)
+            if args.save:
+                save_baseline(path, suite, results)
+                continue
+            baseline = load_baseline(path)
+            if baseline is None:
+                print(f"No baseline at {path}; run with --save to record one")
+                continue
+            print(f"\n--- {suite} vs baseline ---")
+            regressions += compare(results, baseline, args.threshold)
+    
+    if regressions:
+        print("\nLatency regressions:")
+        for message in regressions:
+            print(f"  {message}")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Database Connection Pool for Nursle
+Engine pool options built from configuration, and a QueuePool that records
+checkout waits, timeouts and connections in use for /metrics and /health.
+"""
+
+import time
+from typing import Dict, Optional
+
+from sqlalchemy import exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+
+from metrics import registry, FAST_BUCKETS, DEFAULT_BUCKETS
+
+pool_checkout_seconds = registry.histogram(
+    'nursle_db_pool_checkout_wait_seconds', 'Time spent waiting to check a connection out of the pool',
+    FAST_BUCKETS + DEFAULT_BUCKETS[DEFAULT_BUCKETS.index(0.25):]
+)
+pool_timeouts = registry.counter(
+    'nursle_db_pool_timeouts_total', 'Checkouts that gave up after pool_timeout'
+)
+pool_in_use = registry.gauge(
+    'nursle_db_pool_in_use', 'Connections currently checked out'
+)
+pool_capacity = registry.gauge(
+    'nursle_db_pool_capacity', 'Maximum connections the pool may open (pool_size + max_overflow)'
+)
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that reports checkout waits and in-use connections"""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        pool_capacity.set(self.size() + max(self._max_overflow, 0))
+    
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            pool_timeouts.inc()
+            raise
+        finally:
+            pool_checkout_seconds.observe(time.perf_counter() - start)
+        pool_in_use.set(self.checkedout())
+        return connection
+    
+    def _do_return_conn(self, record):
+        super()._do_return_conn(record)
+        pool_in_use.set(self.checkedout())
+
+def pool_engine_options(database_url: Optional[str], pool_size: int = 5, max_overflow: int = 10,
+                        pool_timeout: float = 30.0, pool_recycle: int = 1800,
+                        pool_pre_ping: bool = True) -> Dict:
+    """
+    Build SQLALCHEMY_ENGINE_OPTIONS for a server database
+    SQLite keeps SQLAlchemy's own pool choice, which depends on whether the
+    database is a file or in memory, so no options are returned for it.
+    """
+    if not database_url or make_url(database_url).get_backend_name() == 'sqlite':
+        return {}
+    return {
+        'poolclass': TimedQueuePool,
+        'pool_size': pool_size,
+        'max_overflow': max_overflow,
+        'pool_timeout': pool_timeout,
+        'pool_recycle': pool_recycle,
+        'pool_pre_ping': pool_pre_ping
+    }
+
+def pool_status(engine) -> Optional[Dict]:
+    """Pool occupancy for /health, or None when the engine has no sized pool"""
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return None
+    # A negative max_overflow means the pool may always open another connection
+    unbounded = pool._max_overflow < 0
+    capacity = pool.size() + max(pool._max_overflow, 0)
+    checked_out = pool.checkedout()
+    return {
+        'size': pool.size(),
+        'max_overflow': pool._max_overflow,
+        'checked_out': checked_out,
+        'idle': pool.checkedin(),
+        'overflow': max(pool.overflow(), 0),
+        'saturation': round(checked_out / capacity, 3) if capacity and not unbounded else 0.0,
+        'saturated': not unbounded and checked_out >= capacity
+    }
@@ -0,0 +1,73 @@
+"""
+Gunicorn configuration for Nursle
+Sizes workers and threads from the CPU count, preloads the app so the AI
+engines' tables are built once in the master and shared copy-on-write, and
+recycles workers after a bounded number of requests.
+
+Every setting can be overridden with the GUNICORN_* environment variables
+below; run `gunicorn -c gunicorn.conf.py --print-config` to see the result.
+"""
+
+import gc
+import multiprocessing
+import os
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+cpu_count = multiprocessing.cpu_count()
+
+bind = os.environ.get('GUNICORN_BIND', f"0.0.0.0:{os.environ.get('PORT', '8000')}")
+reuse_port = True
+wsgi_app = os.environ.get('GUNICORN_APP', 'app:app')
+
+# Requests mix short DB reads with sub-millisecond AI scoring, so a few
+# threads per process cover DB waits while processes cover the CPU work;
+# more threads mostly add GIL contention on the AI routes.
+workers = _env_int('GUNICORN_WORKERS', min(cpu_count * 2 + 1, 12))
+threads = _env_int('GUNICORN_THREADS', 2)
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread' if threads > 1 else 'sync')
+
+# Tell the app how many workers share the CPUs (sizes AI_PROCESS_WORKERS)
+os.environ['WEB_CONCURRENCY'] = str(workers)
+
+# Import the app once in the master so workers share its memory
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+# Recycle workers to bound slow memory growth; jitter avoids restarting them all at once
+max_requests = _env_int('GUNICORN_MAX_REQUESTS', 1000)
+max_requests_jitter = _env_int('GUNICORN_MAX_REQUESTS_JITTER', max_requests // 10)
+
+timeout = _env_int('GUNICORN_TIMEOUT', 30)
+graceful_timeout = _env_int('GUNICORN_GRACEFUL_TIMEOUT', 30)
+keepalive = _env_int('GUNICORN_KEEPALIVE', 5)
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG') or None
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+def when_ready(server):
+    # Build the AI engines once in the master so workers inherit them, then move
+    # everything allocated while preloading out of the collector's view, so
+    # collections in the workers do not touch (and un-share) those pages
+    if preload_app:
+        from ai_integration import ai_integration
+        ai_integration.warm_up()
+        gc.freeze()
+
+def post_fork(server, worker):
+    # Connections opened in the master must not be shared with the children
+    if not preload_app:
+        return
+    from app import app
+    from models import db
+    with app.app_context():
+        db.engine.dispose(close=False)
+
+def post_worker_init(worker):
+    # Start this worker's AI process pool before it accepts requests
+    from app import app
+    if app.config['AI_EXECUTION_BACKEND'] == 'process':
+        from ai_integration import ai_integration
+        ai_integration.warm_up(start_pool=True)
@@ -0,0 +1,266 @@
+"""
+In-process Metrics for Nursle
+Counters, gauges and histograms rendered in the Prometheus text exposition
+format at /metrics, with no external service required.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+FAST_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+def _label_key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ''
+    escaped = (
+        f'{k}="' + v.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+        for k, v in pairs
+    )
+    return '{' + ','.join(escaped) + '}'
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+class Metric:
+    """Base class for a labelled metric family"""
+    kind = 'untyped'
+    
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._lock = threading.Lock()
+    
+    def render(self) -> List[str]:
+        return [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} {self.kind}'] + self._samples()
+    
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+class Counter(Metric):
+    kind = 'counter'
+    
+    def __init__(self, name: str, help_text: str):
+        super().__init__(name, help_text)
+        self._values: Dict[LabelKey, float] = {}
+    
+    def inc(self, amount: float = 1.0, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+    
+    def _samples(self) -> List[str]:
+        with self._lock:
+            return [f'{self.name}{_format_labels(k)} {_format_value(v)}' for k, v in sorted(self._values.items())]
+
+class Gauge(Metric):
+    kind = 'gauge'
+    
+    def __init__(self, name: str, help_text: str):
+        super().__init__(name, help_text)
+        self._values: Dict[LabelKey, float] = {}
+    
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[_label_key(labels)] = value
+    
+    def inc(self, amount: float = 1.0, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+    
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+    
+    def _samples(self) -> List[str]:
+        with self._lock:
+            return [f'{self.name}{_format_labels(k)} {_format_value(v)}' for k, v in sorted(self._values.items())]
+
+class Histogram(Metric):
+    kind = 'histogram'
+    
+    def __init__(self, name: str, help_text: str, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [bucket counts..., sum, count]
+        self._values: Dict[LabelKey, List[float]] = {}
+    
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            if index < len(self.buckets):
+                state[index] += 1
+            state[-2] += value
+            state[-1] += 1
+    
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+    
+    def _samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            for key, state in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, state):
+                    cumulative += count
+                    lines.append(f'{self.name}_bucket{_format_labels(key, ("le", _format_value(bound)))} {cumulative}')
+                lines.append(f'{self.name}_bucket{_format_labels(key, ("le", "+Inf"))} {state[-1]}')
+                lines.append(f'{self.name}_sum{_format_labels(key)} {_format_value(state[-2])}')
+                lines.append(f'{self.name}_count{_format_labels(key)} {state[-1]}')
+        return lines
+
+class MetricsRegistry:
+    """Holds metric families by name and renders them for scraping"""
+    
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+    
+    def _get_or_create(self, cls, name: str, help_text: str, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help_text, **kwargs)
+            return metric
+    
+    def counter(self, name: str, help_text: str) -> Counter:
+        return self._get_or_create(Counter, name, help_text)
+    
+    def gauge(self, name: str, help_text: str) -> Gauge:
+        return self._get_or_create(Gauge, name, help_text)
+    
+    def histogram(self, name: str, help_text: str, buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, help_text, buckets=buckets)
+    
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+# Process-wide registry
+registry = MetricsRegistry()
+
+# AI engine stage timings, recorded by ai_services
+ai_stage_seconds = registry.histogram(
+    'nursle_ai_stage_duration_seconds', 'Time spent in each AI engine stage', FAST_BUCKETS
+)
+
+class RequestMetrics:
+    """Flask integration recording per-request latency, DB time and query counts"""
+    
+    def __init__(self, app=None):
+        self.app = app
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        """Install request hooks, SQLAlchemy cursor events and the /metrics route"""
+        from flask import Response, g, has_request_context, request
+        from sqlalchemy import event
+        from sqlalchemy.engine import Engine
+        
+        app.config.setdefault('METRICS_ENABLED', True)
+        app.config.setdefault('METRICS_PATH', '/metrics')
+        if not app.config['METRICS_ENABLED']:
+            return
+        
+        request_seconds = registry.histogram(
+            'nursle_http_request_duration_seconds', 'Request latency by endpoint'
+        )
+        requests_total = registry.counter(
+            'nursle_http_requests_total', 'Requests served by endpoint and status'
+        )
+        in_progress = registry.gauge(
+            'nursle_http_requests_in_progress', 'Requests currently being served'
+        )
+        request_db_seconds = registry.histogram(
+            'nursle_http_request_db_seconds', 'Database time spent per request'
+        )
+        request_db_queries = registry.histogram(
+            'nursle_http_request_db_queries', 'Queries executed per request', COUNT_BUCKETS
+        )
+        query_seconds = registry.histogram(
+            'nursle_db_query_duration_seconds', 'Duration of individual queries', FAST_BUCKETS
+        )
+        
+        def endpoint_label():
+            return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        
+        @app.before_request
+        def start_request_timer():
+            g.metrics_start = time.perf_counter()
+            g.metrics_db_seconds = 0.0
+            g.metrics_db_queries = 0
+            g.metrics_in_progress = True
+            in_progress.inc()
+        
+        @app.after_request
+        def record_request_metrics(response):
+            start = g.pop('metrics_start', None)
+            if start is not None:
+                endpoint = endpoint_label()
+                request_seconds.observe(time.perf_counter() - start, method=request.method, endpoint=endpoint)
+                requests_total.inc(method=request.method, endpoint=endpoint, status=response.status_code)
+                request_db_seconds.observe(g.get('metrics_db_seconds', 0.0), endpoint=endpoint)
+                request_db_queries.observe(g.get('metrics_db_queries', 0), endpoint=endpoint)
+            return response
+        
+        @app.teardown_request
+        def finish_request(exc):
+            if g.pop('metrics_in_progress', False):
+                in_progress.dec()
+        
+        # Listen on the Engine class so every engine (including sink threads) is covered
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault('metrics_query_start', []).append(time.perf_counter())
+        
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            starts = conn.info.get('metrics_query_start')
+            if not starts:
+                return
+            elapsed = time.perf_counter() - starts.pop()
+            query_seconds.observe(elapsed)
+            if has_request_context() and 'metrics_db_queries' in g:
+                g.metrics_db_seconds += elapsed
+                g.metrics_db_queries += 1
+        
+        if not event.contains(Engine, 'before_cursor_execute', _engine_listeners.get('before')):
+            _engine_listeners['before'] = before_cursor_execute
+            _engine_listeners['after'] = after_cursor_execute
+            event.listen(Engine, 'before_cursor_execute', before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', after_cursor_execute)
+        
+        def metrics_view():
+            return Response(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+        
+        app.add_url_rule(app.config['METRICS_PATH'], 'metrics', metrics_view)
+        app.extensions['request_metrics'] = self
+
+# SQLAlchemy listeners installed by RequestMetrics, kept so they are only registered once
+_engine_listeners: Dict[str, object] = {}
+
+request_metrics = RequestMetrics()
@@ -0,0 +1,37 @@
+from sqlalchemy import func, inspect
+
+from app import app
+from models import db, AnalyticsData
+
+def upgrade():
+    """Create missing tables, then any indexes missing from existing tables"""
+    db.create_all()
+    inspector = inspect(db.engine)
+    if 'ix_analytics_data_date' not in {index['name'] for index in inspector.get_indexes('analytics_data')}:
+        drop_duplicate_analytics_days()
+    created = []
+    for table in db.metadata.sorted_tables:
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in sorted(table.indexes, key=lambda i: i.name):
+            if index.name not in existing:
+                index.create(bind=db.engine)
+                created.append(index.name)
+    return created
+
+def drop_duplicate_analytics_days():
+    """Keep the newest AnalyticsData row per day so the unique date index can be created"""
+    newest = db.session.query(func.max(AnalyticsData.id)).group_by(AnalyticsData.date)
+    removed = AnalyticsData.query.filter(AnalyticsData.id.not_in(newest.scalar_subquery())) \
+        .delete(synchronize_session=False)
+    db.session.commit()
+    if removed:
+        print(f"ℹ️ Removed {removed} duplicate analytics_data row(s)")
+
+if __name__ == '__main__':
+    with app.app_context():
+        created = upgrade()
+    if created:
+        for name in created:
+            print(f"✅ Created index {name}")
+    else:
+        print("ℹ️ Schema is up to date")
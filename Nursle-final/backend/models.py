@@ -1,7 +1,8 @@
 from flask_sqlalchemy import SQLAlchemy
-from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
 
+from passwords import password_hasher
+
 db = SQLAlchemy()
 
 class Nurse(db.Model):
@@ -17,10 +18,18 @@ class Nurse(db.Model):
     password_hash = db.Column(db.String(200), nullable=False)
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.verify(self.password_hash, password)
+
+    def rehash_password_if_needed(self, password):
+        """Re-hash a just-verified password when the hashing policy has changed"""
+        if not password_hasher.needs_rehash(self.password_hash):
+            return False
+        self.set_password(password)
+        password_hasher.record_rehash()
+        return True
 
 class Patient(db.Model):
     def __init__(self, first_name, last_name, age, gender):
@@ -37,6 +46,9 @@ class Patient(db.Model):
     medical_histories = db.relationship('MedicalHistory', backref='patient', lazy=True)
     triage_records = db.relationship('TriageRecord', backref='patient', lazy=True)
 
+# Keyset pagination order for GET /api/patients
+db.Index('ix_patient_created_at_id', Patient.created_at, Patient.id)
+
 class MedicalHistory(db.Model):
     def __init__(self, patient_id, condition, diagnosis_date, treatment, status):
         self.patient_id = patient_id
@@ -52,6 +64,10 @@ class MedicalHistory(db.Model):
     status = db.Column(db.String(50), default='Active')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+# Per-patient history, newest diagnosis first
+db.Index('ix_medical_history_patient_id_diagnosis_date',
+         MedicalHistory.patient_id, MedicalHistory.diagnosis_date.desc())
+
 class Symptom(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), unique=True, nullable=False)
@@ -59,6 +75,9 @@ class Symptom(db.Model):
     severity_weight = db.Column(db.Float, default=1.0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+# Valid TriageRecord.priority values; the analytics rollup counts each one
+TRIAGE_PRIORITIES = ('High', 'Medium', 'Low')
+
 class TriageRecord(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     patient_id = db.Column(db.Integer, db.ForeignKey('patient.id'), nullable=False)
@@ -69,7 +88,11 @@ class TriageRecord(db.Model):
     ai_confidence = db.Column(db.Float)
     predicted_outcome = db.Column(db.String(100))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    
+
+# Time-range scans for analytics rollups, overall and per patient
+db.Index('ix_triage_record_created_at', TriageRecord.created_at)
+db.Index('ix_triage_record_patient_id_created_at', TriageRecord.patient_id, TriageRecord.created_at)
+
 class AnalyticsData(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     date = db.Column(db.Date, nullable=False)
@@ -79,3 +102,28 @@ class AnalyticsData(db.Model):
     low_priority = db.Column(db.Integer, default=0)
     avg_wait_time = db.Column(db.Float, default=0.0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+# One row per day; the rollup upserts on it
+db.Index('ix_analytics_data_date', AnalyticsData.date, unique=True)
+
+class AIPredictionLog(db.Model):
+    __tablename__ = 'ai_prediction_log'
+    id = db.Column(db.Integer, primary_key=True)
+    patient_id = db.Column(db.Integer, db.ForeignKey('patient.id'))
+    nurse_id = db.Column(db.Integer, db.ForeignKey('nurse.id'))
+    prediction_type = db.Column(db.String(50), nullable=False)
+    model_version = db.Column(db.String(50))
+    input_data = db.Column(db.JSON)
+    prediction_result = db.Column(db.JSON)
+    confidence_score = db.Column(db.Float)
+    processing_time = db.Column(db.Float)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class ServerSession(db.Model):
+    __tablename__ = 'server_session'
+    session_id = db.Column(db.String(64), primary_key=True)
+    data = db.Column(db.Text, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+# Expiry sweeps delete by range on expires_at
+db.Index('ix_server_session_expires_at', ServerSession.expires_at)
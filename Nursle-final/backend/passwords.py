@@ -0,0 +1,162 @@
+"""
+Password Hashing Policy for Nursle
+Configurable algorithm and cost, rehash-on-login when the policy changes,
+and optional offloading of hashing to a bounded thread or process pool.
+"""
+
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Callable, Dict, Optional
+
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+from process_pools import pool_context
+
+EXECUTORS = ('inline', 'thread', 'process')
+
+class PasswordHashBusy(Exception):
+    """Raised when hashing could not start before PASSWORD_HASH_TIMEOUT"""
+
+def canonical_method(method: str) -> str:
+    """Expand a werkzeug method string with its defaults, e.g. 'scrypt' -> 'scrypt:32768:8:1'"""
+    parts = method.split(':')
+    if parts[0] == 'scrypt':
+        n = int(parts[1]) if len(parts) > 1 else 2 ** 15
+        r = int(parts[2]) if len(parts) > 2 else 8
+        p = int(parts[3]) if len(parts) > 3 else 1
+        return f'scrypt:{n}:{r}:{p}'
+    if parts[0] == 'pbkdf2':
+        hash_name = parts[1] if len(parts) > 1 else 'sha256'
+        iterations = int(parts[2]) if len(parts) > 2 else DEFAULT_PBKDF2_ITERATIONS
+        return f'pbkdf2:{hash_name}:{iterations}'
+    raise ValueError(f"Unsupported password hash method: {method!r}")
+
+def policy_method(method: str = 'scrypt', cost: Optional[int] = None) -> str:
+    """
+    Build the werkzeug method string for a hashing policy
+    Args:
+        method: 'scrypt' or 'pbkdf2[:hash_name]'
+        cost: scrypt N (a power of two) or PBKDF2 iterations; None keeps the default
+    """
+    parts = method.split(':')
+    if cost is not None:
+        if parts[0] == 'scrypt':
+            parts = ['scrypt', str(int(cost))] + parts[2:]
+        elif parts[0] == 'pbkdf2':
+            parts = ['pbkdf2', parts[1] if len(parts) > 1 else 'sha256', str(int(cost))]
+    return canonical_method(':'.join(parts))
+
+class PasswordHasher:
+    """Hash and verify passwords under the configured policy"""
+    
+    def __init__(self, app=None):
+        self.method = canonical_method('scrypt')
+        self.executor_kind = 'inline'
+        self.max_workers = 1
+        self.timeout: Optional[float] = None
+        self.calls = 0
+        self.rehashes = 0
+        self.busy_rejections = 0
+        self._lock = threading.Lock()
+        self._executor: Optional[Executor] = None
+        self._pid: Optional[int] = None
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        app.config.setdefault('PASSWORD_HASH_METHOD', 'scrypt')
+        app.config.setdefault('PASSWORD_HASH_COST', None)
+        app.config.setdefault('PASSWORD_HASH_EXECUTOR', 'inline')
+        app.config.setdefault('PASSWORD_HASH_WORKERS', min(4, os.cpu_count() or 1))
+        app.config.setdefault('PASSWORD_HASH_TIMEOUT', None)
+        
+        executor_kind = app.config['PASSWORD_HASH_EXECUTOR']
+        if executor_kind not in EXECUTORS:
+            raise ValueError(f"PASSWORD_HASH_EXECUTOR must be one of {', '.join(EXECUTORS)}, got {executor_kind!r}")
+        cost = app.config['PASSWORD_HASH_COST']
+        timeout = app.config['PASSWORD_HASH_TIMEOUT']
+        
+        self.shutdown()
+        self.method = policy_method(app.config['PASSWORD_HASH_METHOD'], int(cost) if cost else None)
+        self.executor_kind = executor_kind
+        self.max_workers = max(int(app.config['PASSWORD_HASH_WORKERS']), 1)
+        self.timeout = float(timeout) if timeout else None
+        app.extensions['password_hasher'] = self
+    
+    def hash(self, password: str) -> str:
+        """Hash a password with the current policy"""
+        return self._call(generate_password_hash, password, self.method)
+    
+    def verify(self, password_hash: str, password: str) -> bool:
+        """Check a password against a stored hash of any supported method"""
+        if not password_hash:
+            return False
+        return self._call(check_password_hash, password_hash, password)
+    
+    def needs_rehash(self, password_hash: str) -> bool:
+        """True when a stored hash was made with a different method or cost than the policy"""
+        try:
+            return canonical_method(password_hash.split('$', 1)[0]) != self.method
+        except ValueError:
+            return True
+    
+    def record_rehash(self):
+        with self._lock:
+            self.rehashes += 1
+    
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'method': self.method,
+                'executor': self.executor_kind,
+                'max_workers': self.max_workers if self.executor_kind != 'inline' else 0,
+                'calls': self.calls,
+                'rehashes': self.rehashes,
+                'busy_rejections': self.busy_rejections
+            }
+    
+    def shutdown(self):
+        """Stop the worker pool; a new one is created on next use"""
+        with self._lock:
+            executor, self._executor, self._pid = self._executor, None, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    def _call(self, func: Callable, *args):
+        with self._lock:
+            self.calls += 1
+        executor = self._ensure_executor()
+        if executor is None:
+            return func(*args)
+        future = executor.submit(func, *args)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            # Only give up on work that never started; running hashes finish quickly
+            if not future.cancel():
+                return future.result()
+            with self._lock:
+                self.busy_rejections += 1
+            raise PasswordHashBusy('Password hashing pool is saturated')
+    
+    def _ensure_executor(self) -> Optional[Executor]:
+        """Create the pool lazily, and again in a forked child where pool threads do not survive"""
+        if self.executor_kind == 'inline':
+            return None
+        pid = os.getpid()
+        if self._pid == pid and self._executor is not None:
+            return self._executor
+        with self._lock:
+            if self._pid != pid or self._executor is None:
+                if self.executor_kind == 'process':
+                    self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=pool_context())
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers, thread_name_prefix='password-hash'
+                    )
+                self._pid = pid
+        return self._executor
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,122 @@
+"""
+Patient and Medical History Queries for Nursle
+SQL statements and response shaping shared by the WSGI routes in app.py and
+the async handlers in asgi.py, so both serving modes return the same JSON.
+"""
+
+import base64
+from datetime import datetime
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from sqlalchemy import Select, or_, select, tuple_
+
+from models import Patient, MedicalHistory
+
+PATIENT_FIELDS = ['id', 'first_name', 'last_name', 'age', 'gender', 'created_at']
+PATIENT_PAGE_DEFAULT = 50
+PATIENT_PAGE_MAX = 500
+MEDICAL_HISTORY_COLUMNS = ['id', 'condition', 'diagnosis_date', 'treatment', 'status', 'created_at']
+
+class QueryError(ValueError):
+    """Invalid query parameters, reported to the client as a 400"""
+
+def encode_cursor(created_at: Optional[datetime], row_id: int) -> str:
+    """Encode a (created_at, id) keyset position as an opaque URL-safe cursor; NULL created_at is empty"""
+    raw = f"{created_at.isoformat() if created_at is not None else ''}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], int]:
+    raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+    created_at, row_id = raw.rsplit('|', 1)
+    return (datetime.fromisoformat(created_at) if created_at else None), int(row_id)
+
+def _isoformat(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+def patient_page_statement(args: Mapping[str, str]) -> Tuple[Select, List[str], int]:
+    """
+    Build the keyset-paginated patient list query from request arguments
+    Args:
+        args: Query string arguments (limit, fields, after)
+    Returns:
+        Tuple of the statement, the fields to return and the page size
+    Raises:
+        QueryError: If an argument is invalid
+    """
+    try:
+        limit = min(max(int(args.get('limit', PATIENT_PAGE_DEFAULT)), 1), PATIENT_PAGE_MAX)
+    except ValueError:
+        raise QueryError('limit must be an integer')
+    
+    fields = PATIENT_FIELDS
+    if args.get('fields'):
+        fields = [f.strip() for f in args['fields'].split(',') if f.strip()]
+        unknown = [f for f in fields if f not in PATIENT_FIELDS]
+        if unknown:
+            raise QueryError(f"Unknown fields: {', '.join(unknown)}")
+    
+    # Select only the requested columns plus the keyset columns, no ORM hydration
+    columns = list(dict.fromkeys(['id', 'created_at'] + fields))
+    statement = select(*[getattr(Patient, c) for c in columns])
+    
+    after = args.get('after')
+    if after:
+        try:
+            after_created_at, after_id = decode_cursor(after)
+        except Exception:
+            raise QueryError('Invalid cursor')
+        if after_created_at is None:
+            statement = statement.where(Patient.created_at.is_(None), Patient.id > after_id)
+        else:
+            statement = statement.where(or_(
+                tuple_(Patient.created_at, Patient.id) > tuple_(after_created_at, after_id),
+                Patient.created_at.is_(None)
+            ))
+    
+    # Patients without created_at come last, as in PostgreSQL's ascending index order
+    statement = statement.order_by(Patient.created_at.asc().nulls_last(), Patient.id).limit(limit + 1)
+    return statement, fields, limit
+
+def patient_page_response(rows, fields: List[str], limit: int) -> Dict:
+    """Shape fetched rows into a page with the cursor for the next one"""
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return {
+        'patients': [{
+            f: (_isoformat(row.created_at) if f == 'created_at' else getattr(row, f))
+            for f in fields
+        } for row in rows],
+        'next_cursor': next_cursor
+    }
+
+def patient_statement(patient_id: int) -> Select:
+    return select(*[getattr(Patient, f) for f in PATIENT_FIELDS]).where(Patient.id == patient_id)
+
+def patient_response(row) -> Dict:
+    return {
+        'id': row.id,
+        'first_name': row.first_name,
+        'last_name': row.last_name,
+        'age': row.age,
+        'gender': row.gender,
+        'created_at': _isoformat(row.created_at)
+    }
+
+def medical_history_statement(patient_id: int) -> Select:
+    return (
+        select(*[getattr(MedicalHistory, c) for c in MEDICAL_HISTORY_COLUMNS])
+        .where(MedicalHistory.patient_id == patient_id)
+        .order_by(MedicalHistory.diagnosis_date.desc())
+    )
+
+def medical_history_response(rows) -> List[Dict]:
+    return [{
+        'id': h.id,
+        'condition': h.condition,
+        'diagnosis_date': h.diagnosis_date.isoformat(),
+        'treatment': h.treatment,
+        'status': h.status,
+        'created_at': _isoformat(h.created_at)
+    } for h in rows]
@@ -0,0 +1,14 @@
+"""
+Process Pool Start Method for Nursle
+Worker pools are started from threaded gunicorn and uvicorn workers, where a
+plain fork can copy locks held by other threads (logging, the SQLAlchemy pool,
+the identity cache) into the child and deadlock it.
+"""
+
+import multiprocessing
+from multiprocessing.context import BaseContext
+
+def pool_context() -> BaseContext:
+    """Multiprocessing context for ProcessPoolExecutor: forkserver where available, else spawn"""
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
@@ -1,7 +1,26 @@
+import argparse
+import csv
+import io
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, text
+
 from app import app
-from models import db, Nurse
+from models import db, Nurse, Patient, MedicalHistory, Symptom, TriageRecord
 
-with app.app_context():
+FIRST_NAMES = ['Amina', 'Brian', 'Chloe', 'David', 'Esther', 'Faith', 'George', 'Hassan',
+               'Irene', 'James', 'Kevin', 'Lucy', 'Mercy', 'Nathan', 'Olivia', 'Peter']
+LAST_NAMES = ['Achieng', 'Baraka', 'Chege', 'Kamau', 'Mwangi', 'Njoroge', 'Odhiambo',
+              'Otieno', 'Wanjiru', 'Smith', 'Johnson', 'Brown', 'Garcia', 'Miller']
+CONDITIONS = [('Hypertension', 'Lifestyle changes, ACE inhibitor'), ('Type 2 Diabetes', 'Metformin'),
+              ('Asthma', 'Inhaled corticosteroids'), ('Migraine', 'Triptans as needed'),
+              ('Influenza', 'Rest and fluids'), ('Pneumonia', 'Antibiotics')]
+HISTORY_STATUSES = ['Active', 'Resolved', 'Chronic']
+PRIORITIES = ['High', 'Medium', 'Medium', 'Low', 'Low', 'Low']
+EXTRA_WORDS = ['since yesterday', 'for three days', 'worse at night', 'mild', 'severe', 'and']
+
+def seed_demo_accounts():
     # Create the nurse account from README
     if not Nurse.query.filter_by(email="nurse@example.com").first():
         nurse = Nurse(
@@ -31,3 +50,159 @@ with app.app_context():
         print("✅ Test user created: test@example.com / N123")
     else:
         print("ℹ️ Test user already exists")
+
+def generate_load_data(nurses=0, patients=0, histories_per_patient=0.0, triage_per_patient=0.0,
+                       seed=42, chunk_size=10000, end_date=datetime(2026, 1, 1), days=365):
+    """
+    Bulk-load synthetic nurses, patients, medical histories, symptoms and triage records
+    The same seed and arguments always produce the same rows. IDs continue after the
+    current maximum, so the generator can run against a populated database.
+    """
+    rng = random.Random(seed)
+    use_copy = db.engine.dialect.name == 'postgresql'
+    span_minutes = days * 24 * 60
+    
+    def random_time():
+        return end_date - timedelta(minutes=rng.randint(0, span_minutes))
+    
+    _seed_symptoms()
+    
+    # Hash once: per-row hashing would dominate load time at realistic scale
+    template_nurse = Nurse('', '', '', '')
+    template_nurse.set_password('LOADTEST')
+    nurse_start = _next_id(Nurse)
+    
+    def nurse_rows():
+        for i in range(nurse_start, nurse_start + nurses):
+            yield {'id': i, 'full_name': f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}',
+                   'email': f'loadtest.nurse{i}@example.com', 'nurse_id': f'LT{i}',
+                   'password_hash': template_nurse.password_hash}
+    _bulk_load(Nurse, nurse_rows(), chunk_size, use_copy)
+    
+    nurse_ids = [row.id for row in db.session.query(Nurse.id).order_by(Nurse.id)]
+    patient_start = _next_id(Patient)
+    patient_ids = range(patient_start, patient_start + patients)
+    
+    def patient_rows():
+        for i in patient_ids:
+            yield {'id': i, 'first_name': rng.choice(FIRST_NAMES), 'last_name': rng.choice(LAST_NAMES),
+                   'age': rng.randint(0, 95), 'gender': rng.choice(['Female', 'Male']),
+                   'created_at': random_time()}
+    _bulk_load(Patient, patient_rows(), chunk_size, use_copy)
+    
+    history_start = _next_id(MedicalHistory)
+    
+    def history_rows():
+        row_id = history_start
+        for patient_id in patient_ids:
+            for _ in range(_count(rng, histories_per_patient)):
+                condition, treatment = rng.choice(CONDITIONS)
+                yield {'id': row_id, 'patient_id': patient_id, 'condition': condition,
+                       'diagnosis_date': end_date - timedelta(days=rng.randint(0, 3650)),
+                       'treatment': treatment, 'status': rng.choice(HISTORY_STATUSES),
+                       'created_at': random_time()}
+                row_id += 1
+    _bulk_load(MedicalHistory, history_rows(), chunk_size, use_copy)
+    
+    vocabulary = [row.name for row in db.session.query(Symptom.name).order_by(Symptom.name)]
+    triage_start = _next_id(TriageRecord)
+    
+    def triage_rows():
+        row_id = triage_start
+        for patient_id in patient_ids:
+            for _ in range(_count(rng, triage_per_patient)):
+                words = rng.sample(vocabulary, rng.randint(1, 4)) + rng.sample(EXTRA_WORDS, rng.randint(0, 2))
+                yield {'id': row_id, 'patient_id': patient_id, 'nurse_id': rng.choice(nurse_ids),
+                       'symptoms': ', '.join(words), 'priority': rng.choice(PRIORITIES),
+                       'diagnosis': None, 'ai_confidence': round(rng.uniform(0.5, 0.98), 3),
+                       'predicted_outcome': None, 'created_at': random_time()}
+                row_id += 1
+    _bulk_load(TriageRecord, triage_rows(), chunk_size, use_copy)
+    
+    if use_copy:
+        _reset_sequences(Nurse, Patient, MedicalHistory, TriageRecord)
+
+def _seed_symptoms():
+    """Add the AI engine symptom vocabulary to the Symptom table"""
+    from ai_services import SYMPTOM_KEYWORDS
+    existing = {row.name for row in db.session.query(Symptom.name)}
+    for category, keywords in SYMPTOM_KEYWORDS.items():
+        for keyword in keywords:
+            if keyword not in existing:
+                db.session.add(Symptom(name=keyword, category=category, severity_weight=1.0))
+                existing.add(keyword)
+    db.session.commit()
+
+def _count(rng, mean):
+    """Per-patient row count averaging `mean`"""
+    return rng.randint(0, int(round(mean * 2))) if mean > 0 else 0
+
+def _next_id(model):
+    return (db.session.query(func.max(model.id)).scalar() or 0) + 1
+
+def _bulk_load(model, rows, chunk_size, use_copy):
+    """Insert generated rows chunk by chunk so memory stays bounded"""
+    total = 0
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            total += _insert_chunk(model, chunk, use_copy)
+            chunk = []
+    if chunk:
+        total += _insert_chunk(model, chunk, use_copy)
+    print(f"✅ Loaded {total:,} {model.__tablename__} rows")
+
+def _insert_chunk(model, chunk, use_copy):
+    if use_copy:
+        # COPY ... FROM STDIN: QUOTE_NONNUMERIC keeps '' distinct from NULL (written unquoted)
+        columns = list(chunk[0].keys())
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, quoting=csv.QUOTE_NONNUMERIC)
+        for row in chunk:
+            writer.writerow([row[c] for c in columns])
+        buffer.seek(0)
+        cursor = db.session.connection().connection.cursor()
+        cursor.copy_expert(
+            f"COPY {model.__tablename__} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer
+        )
+    else:
+        db.session.bulk_insert_mappings(model, chunk)
+    db.session.commit()
+    return len(chunk)
+
+def _reset_sequences(*models):
+    """Move PostgreSQL id sequences past rows loaded with explicit ids"""
+    for model in models:
+        table = model.__tablename__
+        db.session.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE(MAX(id), 1)) FROM {table}"
+        ))
+    db.session.commit()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Seed demo accounts and, optionally, synthetic load data')
+    parser.add_argument('--nurses', type=int, default=0)
+    parser.add_argument('--patients', type=int, default=0)
+    parser.add_argument('--histories-per-patient', type=float, default=2.0)
+    parser.add_argument('--triage-per-patient', type=float, default=3.0)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--chunk-size', type=int, default=10000)
+    parser.add_argument('--end-date', type=datetime.fromisoformat, default=datetime(2026, 1, 1),
+                        help='Latest generated timestamp (ISO format); rows span --days before it')
+    parser.add_argument('--days', type=int, default=365)
+    args = parser.parse_args()
+    
+    with app.app_context():
+        seed_demo_accounts()
+        if args.nurses or args.patients:
+            generate_load_data(
+                nurses=args.nurses,
+                patients=args.patients,
+                histories_per_patient=args.histories_per_patient,
+                triage_per_patient=args.triage_per_patient,
+                seed=args.seed,
+                chunk_size=args.chunk_size,
+                end_date=args.end_date,
+                days=args.days
+            )
@@ -0,0 +1,188 @@
+"""
+Session Backends for Nursle
+Selects how the Flask session is stored: a stateless signed cookie, a SQL
+table with an indexed expiry sweep, or Flask-Session for legacy deployments.
+"""
+
+import logging
+import secrets
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SecureCookieSessionInterface, SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+
+from models import db, ServerSession
+
+logger = logging.getLogger(__name__)
+
+SESSION_BACKENDS = ('cookie', 'sql', 'flask_session')
+
+class SqlSession(CallbackDict, SessionMixin):
+    """Server-side session whose cookie carries only a random id"""
+    
+    def __init__(self, initial=None, sid=None, new=False, expires_at=None):
+        def on_update(self):
+            self.modified = True
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.expires_at = expires_at
+        self.modified = False
+
+class SqlSessionInterface(SessionInterface):
+    """Store sessions in the server_session table, expired rows swept by index"""
+    serializer = TaggedJSONSerializer()
+    
+    def __init__(self, sweep_interval: float = 300.0):
+        self.sweep_interval = sweep_interval
+        self._sweep_lock = threading.Lock()
+        self._last_sweep = 0.0
+    
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if not sid:
+            return SqlSession(sid=self._new_sid(), new=True)
+        
+        table = ServerSession.__table__
+        with db.engine.connect() as conn:
+            row = conn.execute(
+                table.select().where(table.c.session_id == sid, table.c.expires_at > datetime.utcnow())
+            ).first()
+        if row is None:
+            return SqlSession(sid=self._new_sid(), new=True)
+        try:
+            return SqlSession(self.serializer.loads(row.data), sid=sid, expires_at=row.expires_at)
+        except ValueError:
+            return SqlSession(sid=self._new_sid(), new=True)
+    
+    def save_session(self, app, session, response):
+        if not session:
+            if not session.new:
+                self._delete(session.sid)
+                response.delete_cookie(
+                    self.get_cookie_name(app),
+                    domain=self.get_cookie_domain(app),
+                    path=self.get_cookie_path(app),
+                )
+            return
+        
+        now = datetime.utcnow()
+        if not (session.modified or session.new or self.renewal_due(app, session.expires_at, now)):
+            if self.should_set_cookie(app, session):
+                self._set_cookie(app, session, response)
+            return
+        
+        expires_at = now + app.permanent_session_lifetime
+        if session.modified or session.new:
+            self._store(session.sid, self.serializer.dumps(dict(session)), expires_at)
+        else:
+            self._touch(session.sid, expires_at)
+        session.expires_at = expires_at
+        self._maybe_sweep()
+        self._set_cookie(app, session, response)
+    
+    @staticmethod
+    def renewal_due(app, expires_at: Optional[datetime], now: datetime) -> bool:
+        """Unchanged sessions only extend their row once half the lifetime has passed"""
+        return expires_at is None or expires_at - now < app.permanent_session_lifetime / 2
+    
+    def sweep_expired(self) -> int:
+        """Delete expired sessions"""
+        table = ServerSession.__table__
+        with db.engine.begin() as conn:
+            result = conn.execute(table.delete().where(table.c.expires_at <= datetime.utcnow()))
+        return result.rowcount
+    
+    def _maybe_sweep(self):
+        now = time.monotonic()
+        if now - self._last_sweep < self.sweep_interval or not self._sweep_lock.acquire(blocking=False):
+            return
+        try:
+            self._last_sweep = now
+            self.sweep_expired()
+        except Exception as e:
+            logger.error(f"Session sweep failed: {str(e)}")
+        finally:
+            self._sweep_lock.release()
+    
+    def _set_cookie(self, app, session, response):
+        response.set_cookie(
+            self.get_cookie_name(app),
+            session.sid,
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=self.get_cookie_domain(app),
+            path=self.get_cookie_path(app),
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+        )
+    
+    def _store(self, sid: str, data: str, expires_at: datetime):
+        table = ServerSession.__table__
+        with db.engine.begin() as conn:
+            updated = conn.execute(
+                table.update().where(table.c.session_id == sid).values(data=data, expires_at=expires_at)
+            ).rowcount
+            if not updated:
+                conn.execute(table.insert().values(session_id=sid, data=data, expires_at=expires_at))
+    
+    def _touch(self, sid: str, expires_at: datetime):
+        table = ServerSession.__table__
+        with db.engine.begin() as conn:
+            conn.execute(table.update().where(table.c.session_id == sid).values(expires_at=expires_at))
+    
+    def _delete(self, sid: str):
+        table = ServerSession.__table__
+        with db.engine.begin() as conn:
+            conn.execute(table.delete().where(table.c.session_id == sid))
+    
+    @staticmethod
+    def _new_sid() -> str:
+        return secrets.token_urlsafe(32)
+
+class SessionBackend:
+    """Install the session interface selected by SESSION_BACKEND"""
+    
+    def __init__(self, app=None):
+        self.interface = None
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        # Deployments that still set SESSION_TYPE keep using Flask-Session
+        default = 'flask_session' if app.config.get('SESSION_TYPE') else 'cookie'
+        app.config.setdefault('SESSION_BACKEND', default)
+        app.config.setdefault('SESSION_SWEEP_INTERVAL', 300.0)
+        app.config.setdefault('SESSION_COOKIE_HTTPONLY', True)
+        app.config.setdefault('SESSION_COOKIE_SAMESITE', 'Lax')
+        
+        backend = app.config['SESSION_BACKEND'] or default
+        if backend not in SESSION_BACKENDS:
+            raise ValueError(f"SESSION_BACKEND must be one of {', '.join(SESSION_BACKENDS)}, got {backend!r}")
+        
+        if backend == 'cookie':
+            # Flask's signed cookie: no server I/O per request
+            self.interface = SecureCookieSessionInterface()
+        elif backend == 'sql':
+            self.interface = SqlSessionInterface(sweep_interval=app.config['SESSION_SWEEP_INTERVAL'])
+        else:
+            from flask_session import Session
+            Session(app)
+            self.interface = app.session_interface
+        
+        app.session_interface = self.interface
+        app.extensions['session_backend'] = self
+        
+        @app.cli.command('sweep-sessions')
+        def sweep_sessions_command():
+            """Delete expired rows from the SQL session store"""
+            if not isinstance(self.interface, SqlSessionInterface):
+                print("ℹ️ SESSION_BACKEND is not 'sql'; nothing to sweep")
+                return
+            print(f"✅ Deleted {self.interface.sweep_expired()} expired sessions")
+
+session_backend = SessionBackend()
@@ -0,0 +1,166 @@
+"""
+Background bulk-insert sinks for Nursle
+Moves row serialization and database writes off the request thread
+"""
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Dict, List, Optional
+
+from models import db, AIPredictionLog, TriageRecord
+
+logger = logging.getLogger(__name__)
+
+class BulkInsertSink:
+    """Bounded in-memory queue drained by a worker thread that bulk-inserts rows"""
+    
+    def __init__(self, model, name: str, app=None):
+        self.model = model
+        self.name = name
+        self.app = None
+        self.max_queue = 10000
+        self.batch_size = 200
+        self.flush_interval = 1.0
+        self.block_timeout = 0.0
+        self.submitted = 0
+        self.written = 0
+        self.dropped = 0
+        self.write_errors = 0
+        self.batches = 0
+        self._lock = threading.Lock()
+        self._queue: Optional[queue.Queue] = None
+        self._worker: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._exit_hook_registered = False
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app, prefix: Optional[str] = None):
+        """Bind the sink to a Flask app and read its queue settings from config"""
+        prefix = prefix or self.name.upper()
+        app.config.setdefault(f'{prefix}_QUEUE_SIZE', self.max_queue)
+        app.config.setdefault(f'{prefix}_BATCH_SIZE', self.batch_size)
+        app.config.setdefault(f'{prefix}_FLUSH_INTERVAL', self.flush_interval)
+        app.config.setdefault(f'{prefix}_BLOCK_TIMEOUT', self.block_timeout)
+        self.max_queue = int(app.config[f'{prefix}_QUEUE_SIZE'])
+        self.batch_size = int(app.config[f'{prefix}_BATCH_SIZE'])
+        self.flush_interval = float(app.config[f'{prefix}_FLUSH_INTERVAL'])
+        self.block_timeout = float(app.config[f'{prefix}_BLOCK_TIMEOUT'])
+        self.app = app
+    
+    def submit(self, row: Dict) -> bool:
+        """
+        Queue a row for insertion
+        Blocks for at most block_timeout seconds when the queue is full,
+        then drops the row.
+        Returns:
+            bool: True if the row was queued
+        """
+        rows = self._ensure_worker()
+        try:
+            if self.block_timeout > 0:
+                rows.put(row, timeout=self.block_timeout)
+            else:
+                rows.put_nowait(row)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+        with self._lock:
+            self.submitted += 1
+        return True
+    
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until every queued row has been written or dropped"""
+        rows = self._queue
+        if rows is None or self._pid != os.getpid():
+            return True
+        deadline = time.monotonic() + timeout
+        while rows.unfinished_tasks:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+    
+    def stats(self) -> Dict:
+        """Get queue and write counters for health reporting"""
+        with self._lock:
+            return {
+                'queued': self._queue.qsize() if self._queue is not None else 0,
+                'max_queue': self.max_queue,
+                'submitted': self.submitted,
+                'written': self.written,
+                'dropped': self.dropped,
+                'write_errors': self.write_errors,
+                'batches': self.batches
+            }
+    
+    def _ensure_worker(self) -> queue.Queue:
+        """Start the worker lazily, and again in a forked child where threads do not survive"""
+        pid = os.getpid()
+        if self._pid == pid and self._queue is not None:
+            return self._queue
+        with self._lock:
+            if self._pid != pid or self._queue is None:
+                self._queue = queue.Queue(maxsize=self.max_queue)
+                self._worker = threading.Thread(
+                    target=self._run, args=(self._queue,), name=f'{self.name}-sink', daemon=True
+                )
+                self._pid = pid
+                self._worker.start()
+                if not self._exit_hook_registered:
+                    atexit.register(self.flush)
+                    self._exit_hook_registered = True
+        return self._queue
+    
+    def _run(self, rows: queue.Queue):
+        while True:
+            try:
+                batch = [rows.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            # Keep filling until the batch is full or flush_interval has passed since its first row
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(rows.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                self._write(batch)
+            finally:
+                for _ in batch:
+                    rows.task_done()
+    
+    def _write(self, batch: List[Dict]):
+        """Insert a batch with a single executemany statement"""
+        try:
+            with self.app.app_context():
+                db.session.execute(self.model.__table__.insert(), batch)
+                db.session.commit()
+            with self._lock:
+                self.written += len(batch)
+                self.batches += 1
+        except Exception as e:
+            with self._lock:
+                self.write_errors += 1
+                self.dropped += len(batch)
+            logger.error(f"Failed to write {len(batch)} rows to {self.model.__tablename__}: {str(e)}")
+            try:
+                with self.app.app_context():
+                    db.session.rollback()
+            except Exception:
+                pass
+
+# Sink for AI prediction audit rows
+prediction_log_sink = BulkInsertSink(AIPredictionLog, 'ai_prediction_log')
+
+# Sink for buffered triage result writes
+triage_record_sink = BulkInsertSink(TriageRecord, 'triage_record')